@@ -1,29 +1,50 @@
-import calendar
+import gzip
+import json
+import logging
+import os
+import posixpath
+import re
 import sqlite3
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import date, datetime, timedelta
-from email import encoders
-from email.mime.base import MIMEBase
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from email.utils import formatdate
-from functools import wraps
+from functools import partial, wraps
+from hashlib import sha256
+from importlib import import_module
 from itertools import groupby
 from locale import LC_ALL, setlocale
+from mimetypes import guess_type
 from pathlib import Path
-from smtplib import SMTP_SSL
-from subprocess import PIPE, run
+from queue import Empty, Full, LifoQueue
+from string import hexdigits
+from subprocess import PIPE, CalledProcessError, TimeoutExpired, run
+from tempfile import TemporaryDirectory
+from threading import Event, Lock, RLock, Thread
+from time import perf_counter, time
 from uuid import uuid4
 
+import click
 from flask import (
-    Flask, abort, flash, g, redirect, render_template, request, session,
-    url_for)
-from flask_weasyprint import HTML, render_pdf
+    Flask, abort, flash, g, get_flashed_messages, make_response, redirect,
+    render_template, request, send_file, send_from_directory, session,
+    stream_template, url_for)
+from jinja2 import FileSystemBytecodeCache
 from markupsafe import Markup
-from PIL import Image
-from werkzeug.security import check_password_hash, generate_password_hash
+from werkzeug.security import (
+    check_password_hash, generate_password_hash, safe_join)
 from werkzeug.utils import secure_filename
 
-PNG_MAGIC_NUMBER = b'\x89\x50\x4e\x47\x0d\x0a\x1a\x0a'
+try:
+    import brotli
+except ImportError:  # Brotli variants of static files are optional
+    brotli = None
+
+ROADMAP_IMAGE_SIZE = 1000
+ROADMAP_SCREEN_IMAGE_SIZE = 400
+FOLLOWUP_TYPES = ('costume', 'makeup', 'sound', 'vehicle', 'card', 'beeper')
+FOLLOWUP_MAX_MONTHS = 12
+COMPRESSED_ASSET_SUFFIXES = ('.css', '.js', '.svg')
 
 
 setlocale(LC_ALL, 'fr_FR.utf8')
@@ -32,10 +53,41 @@ app = Flask(__name__)
 app.config.update(
     SECRET_KEY=b'change_me_in_configuration_file',
     DB='paillette.db',
+    DB_POOL_SIZE=8,
+    DB_JOURNAL_MODE='wal',
+    DB_SYNCHRONOUS='normal',
+    DB_BUSY_TIMEOUT=5000,
+    DB_MMAP_SIZE=64 * 1024 * 1024,
+    DB_TRACE=True,
+    DB_SLOW_QUERY_THRESHOLD=100,
+    DB_SLOW_QUERY_LOG=None,
     SMTP_HOSTNAME=None,
+    SMTP_PORT=0,
+    SMTP_SSL=True,
     SMTP_LOGIN=None,
     SMTP_PASSWORD=None,
     SMTP_FROM='sender@example.com',
+    SMTP_IDLE_TIMEOUT=30,
+    MAIL_WORKER=True,
+    MAIL_QUEUE_INTERVAL=60,
+    MAIL_RETRY_DELAY=60,
+    MAIL_MAX_ATTEMPTS=6,
+    MAIL_LEASE=600,
+    MIGRATE_ON_STARTUP=True,
+    MIGRATE_TIMEOUT=300,
+    ROADMAP_CACHE_SIZE=256 * 1024 * 1024,
+    ROADMAP_WORKERS=2,
+    ROADMAP_JOB_TIMEOUT=300,
+    GHOSTSCRIPT_WORKERS=4,
+    GHOSTSCRIPT_PAGE_LIMIT=20,
+    GHOSTSCRIPT_TIMEOUT=30,
+    THUMBNAIL_WORKERS=4,
+    TEMPLATE_CACHE=True,
+    PRELOAD_TEMPLATES=(
+        '_layout.jinja2', '_macros.jinja2', 'login.jinja2.html',
+        'spectacles.jinja2.html', 'spectacle_create.jinja2.html',
+        'spectacle_update.jinja2.html', 'roadmap_send.jinja2.html',
+        'artists_followup.jinja2.html', 'resources_followup.jinja2.html'),
     GIT_VERSION=(
         Path(app.root_path).parent / '.git' / 'refs' / 'heads' / 'main'
     ).read_text().strip()[:7],
@@ -43,21 +95,347 @@ app.config.update(
 app.config.from_envvar('PAILLETTE_CONFIG', silent=True)
 
 
+def get_statements(script):
+    statement = ''
+    for part in script.split(';'):
+        statement += f'{part};'
+        if sqlite3.complete_statement(statement):
+            if statement.strip(' \n;'):
+                yield statement
+            statement = ''
+
+
+def migrate(database):
+    connection = sqlite3.connect(
+        database, isolation_level=None,
+        timeout=app.config['MIGRATE_TIMEOUT'])
+    cursor = connection.cursor()
+    cursor.execute('PRAGMA user_version')
+    version = cursor.fetchone()[0]
+    folder = Path(app.root_path).parent / 'sql' / 'migrations'
+    applied = []
+    try:
+        for path in sorted(folder.glob('*.sql')):
+            migration_version = int(path.stem.split('_', 1)[0])
+            if migration_version <= version:
+                continue
+            # Workers migrate on startup, check again once the lock is held
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('PRAGMA user_version')
+            if cursor.fetchone()[0] < migration_version:
+                for statement in get_statements(path.read_text()):
+                    cursor.execute(statement)
+                cursor.execute(f'PRAGMA user_version={migration_version}')
+                applied.append(path.name)
+            cursor.execute('COMMIT')
+    except sqlite3.Error:
+        if connection.in_transaction:
+            cursor.execute('ROLLBACK')
+        raise
+    finally:
+        connection.close()
+    return applied
+
+
+class LazyGroup(click.Group):
+    # Commands are imported from their module only when the group is used
+    def __init__(self, name, module, **kwargs):
+        super().__init__(name, **kwargs)
+        self.module = module
+
+    def get_group(self):
+        return import_module(self.module, __name__).cli
+
+    def list_commands(self, context):
+        return self.get_group().list_commands(context)
+
+    def get_command(self, context, name):
+        return self.get_group().get_command(context, name)
+
+
+app.cli.add_command(
+    LazyGroup('bench', '.bench', help='Benchmark and load-test tools.'))
+
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Apply pending SQL migrations to the database."""
+    applied = migrate(app.config['DB'])
+    print('\n'.join(applied) if applied else 'Database is up to date')
+
+
+if app.config['MIGRATE_ON_STARTUP'] and Path(app.config['DB']).exists():
+    migrate(app.config['DB'])
+
+# Must be set before the Jinja environment is created by template filters
+if app.config['TEMPLATE_CACHE']:
+    template_cache = Path(app.instance_path) / 'templates'
+    template_cache.mkdir(parents=True, exist_ok=True)
+    app.jinja_options = {
+        **app.jinja_options,
+        'bytecode_cache': FileSystemBytecodeCache(str(template_cache))}
+
+
+def load_templates(names):
+    start = perf_counter()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return (perf_counter() - start) * 1000
+
+
+@app.cli.command('compile-templates')
+def compile_templates_command():
+    """Compile all templates into the bytecode cache."""
+    names = app.jinja_env.list_templates()
+    duration = load_templates(names)
+    print(f'{len(names)} templates compiled in {duration:.0f} ms')
+
+
+class TracedCursor(sqlite3.Cursor):
+    query = None
+
+    def timed(self, function, *args):
+        if self.query is None:
+            return function(*args)
+        start = perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.query['duration'] += (perf_counter() - start) * 1000
+
+    def trace(self, sql, parameters, many=False):
+        queries = self.connection.queries
+        if queries is None:
+            self.query = None
+        else:
+            self.query = {
+                'sql': sql, 'parameters': parameters, 'many': many,
+                'duration': 0}
+            queries.append(self.query)
+
+    def execute(self, sql, parameters=()):
+        self.trace(sql, parameters)
+        return self.timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, parameters):
+        parameters = list(parameters)
+        self.trace(sql, parameters, many=True)
+        return self.timed(super().executemany, sql, parameters)
+
+    def fetchone(self):
+        return self.timed(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self.timed(super().fetchmany, size or self.arraysize)
+
+    def fetchall(self):
+        return self.timed(super().fetchall)
+
+    def __next__(self):
+        return self.timed(super().__next__)
+
+
+class TracedConnection(sqlite3.Connection):
+    # Queries are only recorded while the connection is checked out
+    queries = None
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+    def commit(self):
+        if self.queries is None:
+            return super().commit()
+        query = {'sql': 'COMMIT', 'parameters': (), 'many': False}
+        start = perf_counter()
+        try:
+            return super().commit()
+        finally:
+            query['duration'] = (perf_counter() - start) * 1000
+            self.queries.append(query)
+
+
+class ConnectionPool:
+    def __init__(self, database, size, read_only=False):
+        self.database = database
+        self.read_only = read_only
+        self.connections = LifoQueue(size)
+        self.lock = Lock()
+        self.hits = self.misses = self.discarded = 0
+
+    def connect(self):
+        if self.read_only:
+            database = f'{Path(self.database).absolute().as_uri()}?mode=ro'
+        else:
+            database = self.database
+        factory = (
+            TracedConnection if app.config['DB_TRACE'] else sqlite3.Connection)
+        connection = sqlite3.connect(
+            database, detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False, uri=self.read_only, factory=factory)
+        connection.row_factory = sqlite3.Row
+        cursor = connection.cursor()
+        cursor.execute(f'PRAGMA busy_timeout={app.config["DB_BUSY_TIMEOUT"]}')
+        if not self.read_only:
+            cursor.execute(
+                f'PRAGMA journal_mode={app.config["DB_JOURNAL_MODE"]}')
+        cursor.execute(f'PRAGMA synchronous={app.config["DB_SYNCHRONOUS"]}')
+        cursor.execute(f'PRAGMA mmap_size={app.config["DB_MMAP_SIZE"]}')
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+        return connection
+
+    def checkout(self):
+        while True:
+            try:
+                connection = self.connections.get_nowait()
+            except Empty:
+                with self.lock:
+                    self.misses += 1
+                return self.trace(self.connect())
+            try:
+                connection.execute('SELECT 1').close()
+            except sqlite3.Error:
+                with self.lock:
+                    self.discarded += 1
+                connection.close()
+                continue
+            with self.lock:
+                self.hits += 1
+            return self.trace(connection)
+
+    def trace(self, connection):
+        if isinstance(connection, TracedConnection):
+            connection.queries = []
+        return connection
+
+    def checkin(self, connection):
+        try:
+            if isinstance(connection, TracedConnection):
+                connection.queries = None
+            connection.rollback()
+            self.connections.put_nowait(connection)
+        except (sqlite3.Error, Full):
+            connection.close()
+
+    def stats(self):
+        return {
+            'read_only': self.read_only,
+            'size': self.connections.maxsize,
+            'idle': self.connections.qsize(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'discarded': self.discarded,
+        }
+
+
+pools = {}
+
+
+def get_pool(read_only=False):
+    key = (app.config['DB'], read_only)
+    if key not in pools:
+        pool = ConnectionPool(key[0], app.config['DB_POOL_SIZE'], read_only)
+        pools.setdefault(key, pool)
+    return pools[key]
+
+
 def get_connection():
     if not hasattr(g, 'connection'):
-        g.connection = sqlite3.connect(
-            app.config['DB'], detect_types=sqlite3.PARSE_DECLTYPES)
-        g.connection.row_factory = sqlite3.Row
-        cursor = g.connection.cursor()
-        cursor.execute('PRAGMA foreign_keys')
-        cursor.close()
+        g.connection = get_pool(g.get('read_only', False)).checkout()
     return g.connection
 
 
 def close_connection():
     if hasattr(g, 'connection'):
-        g.connection.rollback()
-        g.connection.close()
+        get_pool(g.get('read_only', False)).checkin(g.pop('connection'))
+
+
+slow_query_logger = logging.getLogger(f'{app.logger.name}.sql')
+SENSITIVE_PARAMETER = re.compile('password|secret|token', re.IGNORECASE)
+if app.config['DB_SLOW_QUERY_LOG']:
+    slow_query_logger.addHandler(
+        logging.FileHandler(app.config['DB_SLOW_QUERY_LOG']))
+
+
+def get_query_plan(connection, query):
+    parameters = query['parameters']
+    if query['many']:
+        parameters = parameters[0] if parameters else ()
+    cursor = connection.cursor(sqlite3.Cursor)
+    try:
+        cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}', parameters)
+    except sqlite3.Error:
+        return []
+    depths, lines = {0: 0}, []
+    for id, parent, _, detail in cursor.fetchall():
+        depths[id] = depths.get(parent, 0) + 1
+        lines.append(f'{"  " * depths[id]}{detail}')
+    return lines
+
+
+def get_logged_parameters(sql, parameters):
+    # Forms are bound as a whole, only log the values used by the query
+    if isinstance(parameters, Mapping):
+        return {
+            name: '***' if SENSITIVE_PARAMETER.search(name) else
+            parameters[name]
+            for name in dict.fromkeys(re.findall(r'[:@$](\w+)', sql))
+            if name in parameters}
+    if SENSITIVE_PARAMETER.search(sql):
+        return ('***',) * len(parameters)
+    return parameters
+
+
+def log_slow_queries(connection):
+    threshold = app.config['DB_SLOW_QUERY_THRESHOLD']
+    if threshold is None or not getattr(connection, 'queries', None):
+        return
+    for query in connection.queries:
+        if query['duration'] < threshold:
+            continue
+        parameters = query['parameters']
+        if query['many']:
+            first = (
+                get_logged_parameters(query['sql'], parameters[0])
+                if parameters else None)
+            parameters = f'{len(parameters)} rows, first {first!r}'
+        else:
+            parameters = repr(get_logged_parameters(query['sql'], parameters))
+        lines = (
+            f'{query["duration"]:.1f} ms on {request.method} {request.path}',
+            ' '.join(query['sql'].split()),
+            f'Parameters: {parameters}',
+            *get_query_plan(connection, query))
+        slow_query_logger.warning('\n'.join(lines))
+
+
+@app.before_request
+def start_timer():
+    g.start = perf_counter()
+
+
+@app.after_request
+def add_server_timing(response):
+    timings = [f'app;dur={(perf_counter() - g.start) * 1000:.1f}']
+    queries = getattr(g.get('connection'), 'queries', None)
+    if queries is not None:
+        duration = sum(query['duration'] for query in queries)
+        timings.append(
+            f'db;dur={duration:.1f};desc="{len(queries)} queries"')
+    response.headers['Server-Timing'] = ', '.join(timings)
+    return response
+
+
+@app.teardown_request
+def teardown_request(exception):
+    if hasattr(g, 'connection'):
+        log_slow_queries(g.connection)
 
 
 @app.teardown_appcontext
@@ -79,17 +457,43 @@ def get_person():
     return g.person
 
 
-def get_date_data(year, month):
+# Spectacles whose dates overlap the :start to :stop range
+SPECTACLE_OVERLAP = '''
+  SELECT id
+  FROM spectacle_interval
+  WHERE day_from <= CAST(julianday(:stop) AS INTEGER)
+  AND day_to >= CAST(julianday(:start) AS INTEGER)
+'''
+
+
+def add_months(year, month, months):
+    year, month = divmod(year * 12 + month - 1 + months, 12)
+    return date(year, month + 1, 1)
+
+
+def get_date_data(year, month, months=1):
     if None in (year, month):
         today = date.today()
         year, month = today.year, today.month
+    if not (1 <= month <= 12 and 1 <= months <= FOLLOWUP_MAX_MONTHS):
+        abort(404)
     start = date(year, month, 1)
-    stop = date(year, month, calendar.monthrange(year, month)[1])
-    previous = start - timedelta(days=1)
-    next = stop + timedelta(days=1)
+    next = add_months(year, month, months)
+    stop = next - timedelta(days=1)
+    previous = add_months(year, month, -months)
     return year, month, start, stop, previous, next
 
 
+def get_days(start, stop):
+    return [start + timedelta(days=i) for i in range((stop - start).days + 1)]
+
+
+def stream_page(template, **context):
+    # Flashed messages must leave the session before headers are sent
+    get_flashed_messages()
+    return stream_template(template, **context)
+
+
 def get_spectacle_data(spectacle_id):
     cursor = get_connection().cursor()
     cursor.execute('''
@@ -188,7 +592,320 @@ def get_spectacle_data(spectacle_id):
     }
 
 
+def evict_roadmap_pdfs(folder):
+    paths = []
+    for path in folder.glob('*.pdf'):
+        try:
+            paths.append((path.stat(), path))
+        except FileNotFoundError:
+            continue
+    paths.sort(key=lambda stat_and_path: stat_and_path[0].st_atime)
+    size = sum(stat.st_size for stat, _ in paths)
+    while paths and size > app.config['ROADMAP_CACHE_SIZE']:
+        stat, path = paths.pop(0)
+        path.unlink(missing_ok=True)
+        size -= stat.st_size
+
+
+def get_roadmap_path(spectacle_id, key):
+    if len(key) != 64 or not all(char in hexdigits for char in key):
+        abort(404)
+    return Path(app.instance_path) / 'roadmaps' / f'{spectacle_id}-{key}.pdf'
+
+
+def render_roadmap_html(spectacle_data):
+    html = render_template(
+        'roadmap.jinja2.html', page_name='roadmap', **spectacle_data)
+    key = sha256(html.encode())
+    images_folder = Path(app.static_folder) / 'roadmap_images'
+    for image in spectacle_data['images']:
+        path = images_folder / image['filename']
+        if path.exists():
+            stat = path.stat()
+            key.update(f'{image["filename"]}:{stat.st_size}:'.encode())
+            key.update(f'{stat.st_mtime_ns}'.encode())
+    return html, key.hexdigest()
+
+
+def render_roadmap_pdf(html, url_root, path):
+    # WeasyPrint and its Pango stack are only loaded by roadmap workers
+    from flask_weasyprint import HTML
+
+    with app.test_request_context(base_url=url_root):
+        pdf = HTML(string=html).write_pdf()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_suffix(f'.{uuid4()}.tmp')
+    temporary_path.write_bytes(pdf)
+    temporary_path.replace(path)
+    spectacle_id = path.stem.split('-', 1)[0]
+    for old_path in path.parent.glob(f'{spectacle_id}-*'):
+        if old_path.suffix in ('.pdf', '.failed') and old_path != path:
+            old_path.unlink(missing_ok=True)
+    evict_roadmap_pdfs(path.parent)
+
+
+roadmap_executor = None
+roadmap_jobs = {}
+roadmap_jobs_lock = RLock()
+
+
+def forget_roadmap_job(path, future):
+    with roadmap_jobs_lock:
+        if roadmap_jobs.get(path) is future:
+            del roadmap_jobs[path]
+
+
+def finish_roadmap_job(path, future):
+    # Job state is kept in files, status polls may reach another worker
+    if not future.cancelled() and future.exception() is not None:
+        path.with_suffix('.failed').write_text(str(future.exception()))
+    path.with_suffix('.pending').unlink(missing_ok=True)
+    forget_roadmap_job(path, future)
+
+
+def get_roadmap_job_status(path):
+    # Results are written before the pending marker is removed
+    try:
+        started = path.with_suffix('.pending').stat().st_mtime
+    except FileNotFoundError:
+        started = None
+    if path.exists():
+        return 'done', None
+    try:
+        return 'failed', path.with_suffix('.failed').read_text()
+    except FileNotFoundError:
+        pass
+    if started is None:
+        return None, None
+    if time() - started > app.config['ROADMAP_JOB_TIMEOUT']:
+        return 'failed', 'Timeout'
+    return 'pending', None
+
+
+def submit_roadmap(spectacle_id, spectacle_data):
+    global roadmap_executor
+    html, key = render_roadmap_html(spectacle_data)
+    path = get_roadmap_path(spectacle_id, key)
+    if path.exists():
+        return key, None
+    with roadmap_jobs_lock:
+        future = roadmap_jobs.get(path)
+        if future is None or future.done():
+            if roadmap_executor is None:
+                roadmap_executor = ProcessPoolExecutor(
+                    app.config['ROADMAP_WORKERS'])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.with_suffix('.pending').touch()
+            path.with_suffix('.failed').unlink(missing_ok=True)
+            future = roadmap_executor.submit(
+                render_roadmap_pdf, html, request.url_root, path)
+            roadmap_jobs[path] = future
+            future.add_done_callback(partial(finish_roadmap_job, path))
+    return key, future
+
+
+def get_roadmap_pdf(spectacle_id, spectacle_data, use=Path.read_bytes):
+    # Other renders may remove the file before it is used, render it again
+    for attempt in range(3):
+        key, future = submit_roadmap(spectacle_id, spectacle_data)
+        path = get_roadmap_path(spectacle_id, key)
+        if future is not None:
+            future.result()
+        try:
+            os.utime(path, (time(), path.stat().st_mtime))
+            return use(path)
+        except FileNotFoundError:
+            if attempt == 2:
+                raise
+
+
+def get_pdf_page_count(pdf_path):
+    command = [
+        'gs', '-q', '-dNODISPLAY', '-dSAFER', '-dNOPAUSE', '-dBATCH',
+        f'--permit-file-read={pdf_path}', f'-sFile={pdf_path}', '-c',
+        'File (r) file runpdfbegin pdfpagecount = quit']
+    output = run(
+        command, stdout=PIPE, check=True,
+        timeout=app.config['GHOSTSCRIPT_TIMEOUT']).stdout
+    return int(output)
+
+
+def rasterize_pdf_page(pdf_path, page, png_path):
+    # A4 pages are rendered as wide as images, variants are then downsized
+    dpi = 72 * ROADMAP_IMAGE_SIZE / 595
+    command = [
+        'gs', '-q', '-dSAFER', '-dNOPAUSE', '-dBATCH', '-sDEVICE=png16m',
+        '-dTextAlphaBits=4', '-dGraphicsAlphaBits=4', f'-r{dpi:.2f}',
+        f'-dFirstPage={page}', f'-dLastPage={page}',
+        f'-sOutputFile={png_path}', str(pdf_path)]
+    run(command, check=True, timeout=app.config['GHOSTSCRIPT_TIMEOUT'])
+
+
+def rasterize_pdf(pdf_path, folder, name):
+    count = get_pdf_page_count(pdf_path)
+    limit = app.config['GHOSTSCRIPT_PAGE_LIMIT']
+    if count > limit:
+        flash(f'Seules les {limit} premières pages ont été ajoutées.')
+    pages = []
+    with ThreadPoolExecutor(app.config['GHOSTSCRIPT_WORKERS']) as executor:
+        for i in range(min(count, limit)):
+            filename = f'{name}-page{i}.png'
+            future = executor.submit(
+                rasterize_pdf_page, pdf_path, i + 1, folder / filename)
+            pages.append((filename, future))
+    filenames = []
+    for filename, future in pages:
+        try:
+            future.result()
+        except (CalledProcessError, TimeoutExpired):
+            flash(f'La page {filename} n’a pas pu être convertie.')
+            (folder / filename).unlink(missing_ok=True)
+        else:
+            filenames.append(filename)
+    return filenames
+
+
+def get_roadmap_image_paths(filename):
+    folder = Path(app.static_folder) / 'roadmap_images'
+    return {
+        'original': folder / 'originals' / filename,
+        'pdf': folder / filename,
+        'screen': folder / f'{filename}.screen.webp',
+    }
+
+
+def make_roadmap_image_variants(filename):
+    from PIL import Image
+
+    paths = get_roadmap_image_paths(filename)
+    source = paths['original'] if paths['original'].exists() else paths['pdf']
+    with Image.open(source) as image:
+        image.draft(None, (ROADMAP_IMAGE_SIZE, ROADMAP_IMAGE_SIZE))
+        image.thumbnail((ROADMAP_IMAGE_SIZE, ROADMAP_IMAGE_SIZE))
+        image.save(paths['pdf'], optimize=True)
+        image.thumbnail((ROADMAP_SCREEN_IMAGE_SIZE, ROADMAP_SCREEN_IMAGE_SIZE))
+        image.save(paths['screen'], 'WEBP')
+
+
+def make_roadmap_images_variants(filenames):
+    with ThreadPoolExecutor(app.config['THUMBNAIL_WORKERS']) as executor:
+        for future in [
+                executor.submit(make_roadmap_image_variants, filename)
+                for filename in filenames]:
+            future.result()
+
+
+@app.cli.command('roadmap-images')
+def roadmap_images_command():
+    """Build the missing variants of the roadmap images."""
+    connection = get_pool().connect()
+    filenames = [
+        row['filename'] for row in
+        connection.execute('SELECT filename FROM spectacle_image')
+        if not get_roadmap_image_paths(row['filename'])['screen'].exists()]
+    connection.close()
+    make_roadmap_images_variants(filenames)
+    print(f'{len(filenames)} images updated')
+
+
+def write_asset(path, content, compress=None):
+    if path.exists():
+        return
+    if compress:
+        content = compress(content)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_name(f'{path.name}.{uuid4()}.tmp')
+    temporary_path.write_bytes(content)
+    temporary_path.replace(path)
+
+
+def build_assets():
+    static = Path(app.static_folder)
+    folder = Path(app.instance_path) / 'assets'
+    paths = [
+        path for path in sorted(static.rglob('*')) if path.is_file()
+        and path.relative_to(static).parts[0] != 'roadmap_images']
+    assets = {}
+
+    def replace_url(match):
+        if match[2].decode() not in assets:
+            return match[0]
+        url = posixpath.relpath(
+            assets[match[2].decode()], posixpath.dirname(name) or '.')
+        return match[1] + url.encode()
+
+    # Stylesheets come last, as they refer to other hashed files
+    for path in sorted(paths, key=lambda path: path.suffix == '.css'):
+        name = path.relative_to(static).as_posix()
+        content = path.read_bytes()
+        if path.suffix == '.css':
+            content = re.sub(rb'(url\()/static/([^)]+)', replace_url, content)
+        digest = sha256(content).hexdigest()[:12]
+        hashed_path = path.with_name(f'{path.stem}.{digest}{path.suffix}')
+        assets[name] = hashed_path.relative_to(static).as_posix()
+        target = folder / assets[name]
+        write_asset(target, content)
+        if path.suffix in COMPRESSED_ASSET_SUFFIXES:
+            write_asset(
+                target.with_name(f'{target.name}.gz'), content,
+                partial(gzip.compress, mtime=0))
+            if brotli:
+                write_asset(
+                    target.with_name(f'{target.name}.br'), content,
+                    brotli.compress)
+    return assets
+
+
+assets = {}
+assets_lock = Lock()
+
+
+def get_assets():
+    with assets_lock:
+        if not assets:
+            assets.update(build_assets())
+    return assets
+
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Write content-hashed and compressed copies of static files."""
+    for name, hashed_name in get_assets().items():
+        print(f'{name} -> {hashed_name}')
+
+
+def get_spectacles(condition, parameters, order):
+    cursor = get_connection().cursor()
+    cursor.execute(f'''
+      SELECT spectacle.*, spectacle_summary.*
+      FROM spectacle
+      LEFT JOIN spectacle_summary
+      ON spectacle.id = spectacle_summary.spectacle_id
+      WHERE {condition}
+      ORDER BY {order}
+    ''', parameters)
+    return cursor.fetchall()
+
+
+@app.cli.command('rebuild-summary')
+def rebuild_summary_command():
+    """Rebuild the spectacle summary table from scratch."""
+    connection = get_pool().connect()
+    connection.executescript('''
+      BEGIN;
+      DELETE FROM spectacle_summary;
+      INSERT INTO spectacle_summary SELECT * FROM spectacle_summary_view;
+      COMMIT;
+    ''')
+    connection.close()
+
+
 def send_mail(to, subject, content, pdfs=None):
+    from email import encoders
+    from email.mime.base import MIMEBase
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
     message = MIMEMultipart()
     message['From'] = app.config['SMTP_FROM']
     message['To'] = ', '.join(to)
@@ -217,10 +934,130 @@ def send_mail(to, subject, content, pdfs=None):
         flash(Markup(markup))
         return
 
-    smtp = SMTP_SSL(app.config['SMTP_HOSTNAME'])
-    smtp.login(app.config['SMTP_LOGIN'], app.config['SMTP_PASSWORD'])
-    smtp.send_message(message)
-    smtp.quit()
+    now = datetime.now()
+    cursor = get_connection().cursor()
+    cursor.execute('''
+      INSERT INTO
+        mail (sender, recipients, subject, message, created, next_attempt)
+      VALUES
+        (?, ?, ?, ?, ?, ?)
+    ''', (
+        message['From'], message['To'], subject, message.as_bytes(), now,
+        now))
+    cursor.connection.commit()
+    if app.config['MAIL_WORKER']:
+        start_mail_worker()
+    mail_event.set()
+
+
+def connect_smtp():
+    from smtplib import SMTP, SMTP_SSL
+
+    smtp_class = SMTP_SSL if app.config['SMTP_SSL'] else SMTP
+    smtp = smtp_class(app.config['SMTP_HOSTNAME'], app.config['SMTP_PORT'])
+    if app.config['SMTP_LOGIN']:
+        smtp.login(app.config['SMTP_LOGIN'], app.config['SMTP_PASSWORD'])
+    return smtp
+
+
+def close_smtp(smtp):
+    from smtplib import SMTPException
+
+    try:
+        smtp.quit()
+    except (OSError, SMTPException):
+        smtp.close()
+
+
+def send_queued_mails(connection, smtp=None):
+    from smtplib import SMTPException
+
+    cursor = connection.cursor()
+    while True:
+        now = datetime.now()
+        lease = timedelta(seconds=app.config['MAIL_LEASE'])
+        cursor.execute('''
+          UPDATE mail
+          SET attempts = attempts + 1, next_attempt = ?
+          WHERE id = (
+            SELECT id
+            FROM mail
+            WHERE status = 'pending'
+            AND next_attempt <= ?
+            ORDER BY id
+            LIMIT 1
+          )
+          RETURNING id, sender, recipients, message, attempts
+        ''', (now + lease, now))
+        mail = cursor.fetchone()
+        connection.commit()
+        if mail is None:
+            return smtp
+
+        try:
+            if smtp is None:
+                smtp = connect_smtp()
+            smtp.sendmail(
+                mail['sender'], mail['recipients'].split(', '),
+                mail['message'])
+        except (OSError, SMTPException) as exception:
+            if smtp is not None:
+                close_smtp(smtp)
+                smtp = None
+            failed = mail['attempts'] >= app.config['MAIL_MAX_ATTEMPTS']
+            delay = (
+                app.config['MAIL_RETRY_DELAY'] * 2 ** (mail['attempts'] - 1))
+            cursor.execute('''
+              UPDATE mail
+              SET status = ?, error = ?, next_attempt = ?
+              WHERE id = ?
+            ''', (
+                'failed' if failed else 'pending', str(exception),
+                now + timedelta(seconds=delay), mail['id']))
+        else:
+            cursor.execute('''
+              UPDATE mail
+              SET status = 'sent', error = NULL, sent = ?
+              WHERE id = ?
+            ''', (datetime.now(), mail['id']))
+        connection.commit()
+
+
+def mail_worker():
+    smtp = None
+    while True:
+        # Mails queued while sending set the event again
+        mail_event.clear()
+        # Commands such as load-test change the database after startup
+        connection = get_pool().connect()
+        try:
+            smtp = send_queued_mails(connection, smtp)
+        finally:
+            connection.close()
+        if smtp is None:
+            mail_event.wait(app.config['MAIL_QUEUE_INTERVAL'])
+        elif not mail_event.wait(app.config['SMTP_IDLE_TIMEOUT']):
+            close_smtp(smtp)
+            smtp = None
+
+
+mail_event = Event()
+mail_thread = None
+mail_thread_lock = Lock()
+
+
+def start_mail_worker():
+    global mail_thread
+    with mail_thread_lock:
+        if mail_thread is None or not mail_thread.is_alive():
+            mail_thread = Thread(target=mail_worker, daemon=True)
+            mail_thread.start()
+
+
+@app.cli.command('mail-worker')
+def mail_worker_command():
+    """Send queued mails, waiting for new ones forever."""
+    mail_worker()
 
 
 def authenticated(function):
@@ -232,6 +1069,52 @@ def authenticated(function):
     return wrapper
 
 
+def read_only(function):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        g.read_only = True
+        return function(*args, **kwargs)
+    return wrapper
+
+
+def get_etag(tables):
+    cursor = get_connection().cursor()
+    cursor.execute(f'''
+      SELECT name, version
+      FROM table_version
+      WHERE name IN ({', '.join('?' * len(tables))})
+      ORDER BY name
+    ''', tables)
+    versions = [tuple(row) for row in cursor.fetchall()]
+    state = sorted(
+        (key, repr(value)) for key, value in session.items()
+        if key != '_flashes')
+    key = (
+        app.config['GIT_VERSION'], request.full_path, date.today(), state,
+        versions)
+    return sha256(repr(key).encode()).hexdigest()[:32]
+
+
+def conditional(*tables):
+    # Pages only depend on the given tables, the session and the URL
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if '_flashes' in session:
+                return function(*args, **kwargs)
+            etag = get_etag(tables)
+            if etag in request.if_none_match:
+                response = app.response_class(status=304)
+            else:
+                response = make_response(function(*args, **kwargs))
+            response.set_etag(etag)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+
 @app.errorhandler(403)
 def page_not_found(error):
     flash('Merci de vous connecter pour accéder à cette page')
@@ -279,12 +1162,45 @@ def isoweek(day):
     return date.isocalendar(day).week
 
 
-@app.template_filter('version')
-def version(url):
-    return f'{url}?{app.config["GIT_VERSION"]}'
+@app.template_filter('roadmap_image')
+def roadmap_image(filename, variant):
+    paths = get_roadmap_image_paths(filename)
+    path = paths[variant] if paths[variant].exists() else paths['pdf']
+    return path.relative_to(app.static_folder).as_posix()
+
+
+@app.template_filter('asset')
+def asset(filename):
+    return url_for('asset_file', filename=get_assets()[filename])
 
 
 # Common
+@app.route('/assets/<path:filename>')
+def asset_file(filename):
+    get_assets()
+    folder = Path(app.instance_path) / 'assets'
+    path = safe_join(str(folder), filename) or abort(404)
+    # Hashed names change with content, files can be cached forever
+    max_age = 365 * 24 * 60 * 60
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[encoding] and Path(path + suffix).exists():
+            response = send_file(
+                path + suffix, guess_type(filename)[0], max_age=max_age)
+            response.content_encoding = encoding
+            break
+    else:
+        response = send_from_directory(folder, filename, max_age=max_age)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
+
+
+@app.route('/status')
+@authenticated
+def status():
+    return {'pools': [get_pool(False).stats(), get_pool(True).stats()]}
+
+
 @app.route('/')
 def index():
     return redirect(url_for('spectacles' if get_person() else 'login'))
@@ -301,7 +1217,7 @@ def login():
           WHERE id NOT IN (SELECT person_id FROM artist)
           AND mail IS NOT NULL
           AND mail = :login
-        ''', request.form)
+        ''', {'login': request.form['login']})
         person = cursor.fetchone()
         if person and (app.config['DEBUG'] or person['password']):
             passwords = person['password'], request.form['password']
@@ -405,137 +1321,44 @@ def hide(type, id):
 # Spectacles
 @app.route('/spectacles')
 @app.route('/spectacles/<int:year>/<int:month>')
+@read_only
 @authenticated
+@conditional('spectacle', 'spectacle_summary')
 def spectacles(year=None, month=None):
     year, month, start, stop, previous, next = get_date_data(year, month)
-    cursor = get_connection().cursor()
-    cursor.execute('''
-      SELECT
-        spectacle.*,
-        MIN(date) AS first_date,
-        MAX(date) AS last_date,
-        GROUP_CONCAT(DISTINCT contract.artist_id) AS contract_artist_ids,
-        GROUP_CONCAT(DISTINCT replace(vehicle.name, ',', ' ')) AS vehicles,
-        GROUP_CONCAT(DISTINCT replace(makeup.name, ',', ' ')) AS makeups,
-        GROUP_CONCAT(DISTINCT replace(sound.name, ',', ' ')) AS sounds,
-        GROUP_CONCAT(DISTINCT replace(beeper.name, ',', ' ')) AS beepers,
-        GROUP_CONCAT(DISTINCT replace(card.name, ',', ' ')) AS cards,
-        GROUP_CONCAT(DISTINCT replace(person.name, ',', ' ')) AS artists,
-        GROUP_CONCAT(
-          DISTINCT replace(representation.name, ',', ' ')) AS representations
-      FROM spectacle
-      LEFT JOIN contract
-      ON spectacle.id = contract.spectacle_id
-      LEFT JOIN representation
-      ON spectacle.id = representation.spectacle_id
-      LEFT JOIN representation_date
-      ON representation.id = representation_date.representation_id
-      LEFT JOIN artist_representation_date
-      ON representation_date.id = artist_representation_date.representation_date_id
-      LEFT JOIN artist
-      ON artist.id = artist_representation_date.artist_id
-      LEFT JOIN person
-      ON person.id = artist.person_id
-      LEFT JOIN vehicle_spectacle
-      ON spectacle.id = vehicle_spectacle.spectacle_id
-      LEFT JOIN vehicle
-      ON vehicle_spectacle.vehicle_id = vehicle.id
-      LEFT JOIN makeup_spectacle
-      ON spectacle.id = makeup_spectacle.spectacle_id
-      LEFT JOIN makeup
-      ON makeup_spectacle.makeup_id = makeup.id
-      LEFT JOIN sound_spectacle
-      ON spectacle.id = sound_spectacle.spectacle_id
-      LEFT JOIN sound
-      ON sound_spectacle.sound_id = sound.id
-      LEFT JOIN beeper_spectacle
-      ON spectacle.id = beeper_spectacle.spectacle_id
-      LEFT JOIN beeper
-      ON beeper_spectacle.beeper_id = beeper.id
-      LEFT JOIN card_spectacle
-      ON spectacle.id = card_spectacle.spectacle_id
-      LEFT JOIN card
-      ON card_spectacle.card_id = card.id
-      WHERE date_from BETWEEN ? AND ?
-      OR date_to BETWEEN ? AND ?
-      GROUP BY spectacle.id
-      ORDER BY date_from, date_to, place
-    ''', (start, stop) * 2)  # Assume that spectacles last less than 1 month
-    spectacles = cursor.fetchall()
+    spectacles = get_spectacles(
+        f'spectacle.id IN ({SPECTACLE_OVERLAP})',
+        {'start': start, 'stop': stop}, 'date_from, date_to, place')
     return render_template(
         'spectacles.jinja2.html', spectacles=spectacles, start=start,
         stop=stop, previous=previous, next=next)
 
 
 @app.route('/spectacles/filter', methods=('GET', 'POST'))
+@read_only
 @authenticated
 def spectacles_filter():
     if request.method == 'POST':
-        cursor = get_connection().cursor()
         filter_type = request.form.get('type')
-        sql_request = '''
-          SELECT
-            spectacle.*,
-            MIN(date) AS first_date,
-            MAX(date) AS last_date,
-            GROUP_CONCAT(DISTINCT contract.artist_id) AS contract_artist_ids,
-            GROUP_CONCAT(DISTINCT replace(vehicle.name, ',', ' ')) AS vehicles,
-            GROUP_CONCAT(DISTINCT replace(makeup.name, ',', ' ')) AS makeups,
-            GROUP_CONCAT(DISTINCT replace(beeper.name, ',', ' ')) AS beepers,
-            GROUP_CONCAT(DISTINCT replace(card.name, ',', ' ')) AS cards,
-            GROUP_CONCAT(DISTINCT replace(person.name, ',', ' ')) AS artists,
-            GROUP_CONCAT(
-              DISTINCT replace(representation.name, ',', ' ')) AS representations
-          FROM spectacle
-          LEFT JOIN contract
-          ON spectacle.id = contract.spectacle_id
-          LEFT JOIN representation
-          ON spectacle.id = representation.spectacle_id
-          LEFT JOIN representation_date
-          ON representation.id = representation_date.representation_id
-          LEFT JOIN artist_representation_date
-          ON representation_date.id = artist_representation_date.representation_date_id
-          LEFT JOIN artist
-          ON artist.id = artist_representation_date.artist_id
-          LEFT JOIN person
-          ON person.id = artist.person_id
-          LEFT JOIN vehicle_spectacle
-          ON spectacle.id = vehicle_spectacle.spectacle_id
-          LEFT JOIN vehicle
-          ON vehicle_spectacle.vehicle_id = vehicle.id
-          LEFT JOIN makeup_spectacle
-          ON spectacle.id = makeup_spectacle.spectacle_id
-          LEFT JOIN makeup
-          ON makeup_spectacle.makeup_id = makeup.id
-          LEFT JOIN beeper_spectacle
-          ON spectacle.id = beeper_spectacle.spectacle_id
-          LEFT JOIN beeper
-          ON beeper_spectacle.beeper_id = beeper.id
-          LEFT JOIN card_spectacle
-          ON spectacle.id = card_spectacle.spectacle_id
-          LEFT JOIN card
-          ON card_spectacle.card_id = card.id
-        '''
         if filter_type == 'city':
-            sql_request += '''
-              WHERE place LIKE :city
-            '''
+            condition = 'place LIKE :city'
         elif filter_type == 'date':
             if request.form['spectacle_to']:
-                sql_request += '''
-                  WHERE date BETWEEN :spectacle_from AND :spectacle_to
-                '''
+                dates = 'BETWEEN :spectacle_from AND :spectacle_to'
             else:
-                sql_request += '''
-                  WHERE date = :spectacle_from
-                '''
-        sql_request += '''
-          GROUP BY spectacle.id
-          ORDER BY date_from DESC, date_to DESC, place
-        '''
+                dates = '= :spectacle_from'
+            condition = f'''
+              spectacle.id IN (
+                SELECT representation.spectacle_id
+                FROM representation
+                JOIN representation_date
+                ON representation.id = representation_date.representation_id
+                WHERE date {dates}
+              )
+            '''
         if filter_type in ('city', 'date'):
-            cursor.execute(sql_request, request.form)
-            spectacles = cursor.fetchall()
+            spectacles = get_spectacles(
+                condition, request.form, 'date_from DESC, date_to DESC, place')
         else:
             spectacles = []
         return render_template(
@@ -545,6 +1368,53 @@ def spectacles_filter():
     return render_template('spectacles_filter.jinja2.html')
 
 
+def get_form_representations(form):
+    representations = {}
+    for key, name in form.items():
+        if not key.endswith('-name'):
+            continue
+        key = key.split('-', 1)[0]
+        dates = dict.fromkeys(
+            date for date in form.getlist(f'{key}-dates') if date)
+        artists = {
+            int(artist_id) for artist_id in form.getlist(f'{key}-artists')
+            if artist_id}
+        representations[key] = (name, list(dates), artists)
+    return representations
+
+
+def insert_representations(cursor, spectacle_id, representations):
+    dates, artists = [], []
+    for name, representation_dates, representation_artists in representations:
+        cursor.execute('''
+          INSERT INTO representation (spectacle_id, name)
+          VALUES (?, ?)
+          RETURNING id
+        ''', (spectacle_id, name))
+        representation_id = cursor.fetchone()['id']
+        dates += [(representation_id, date) for date in representation_dates]
+        artists += [
+            (artist_id, representation_id, date)
+            for date in representation_dates
+            for artist_id in representation_artists]
+    return dates, artists
+
+
+def insert_representation_dates(cursor, dates, artists):
+    cursor.executemany('''
+      INSERT INTO representation_date (representation_id, date)
+      VALUES (?, ?)
+    ''', dates)
+    cursor.executemany('''
+      INSERT INTO
+        artist_representation_date (representation_date_id, artist_id)
+      SELECT id, ?
+      FROM representation_date
+      WHERE representation_id = ?
+      AND date = ?
+    ''', artists)
+
+
 @app.route('/spectacle/create', methods=('GET', 'POST'))
 @app.route('/spectacle/create/from/<int:spectacle_id>')
 @authenticated
@@ -569,52 +1439,25 @@ def spectacle_create(spectacle_id=None):
         spectacle_id = cursor.fetchone()['id']
 
         for table in tables:
-            for table_id in request.form.getlist(f'{table}s'):
-                cursor.execute(f'''
-                  INSERT INTO
-                    {table}_spectacle ({table}_id, spectacle_id)
-                  VALUES
-                    (?, ?)
-                ''', (table_id, spectacle_id))
+            cursor.executemany(f'''
+              INSERT INTO
+                {table}_spectacle ({table}_id, spectacle_id)
+              VALUES
+                (?, ?)
+            ''', [
+                (table_id, spectacle_id)
+                for table_id in request.form.getlist(f'{table}s')])
 
         contracts = set(request.form.getlist('artist-contracts'))
-        for contract in contracts:
-            cursor.execute('''
-              INSERT INTO contract (spectacle_id, artist_id)
-              VALUES (?, ?)
-            ''', (spectacle_id, contract))
+        cursor.executemany('''
+          INSERT INTO contract (spectacle_id, artist_id)
+          VALUES (?, ?)
+        ''', [(spectacle_id, contract) for contract in contracts])
 
-        for key, name in request.form.items():
-            if not key.endswith('-name'):
-                continue
-            key = key.split('-', 1)[0]
-            dates = request.form.getlist(f'{key}-dates')
-            artists = set(request.form.getlist(f'{key}-artists'))
-            cursor.execute('''
-              INSERT INTO representation (spectacle_id, name)
-              VALUES (?, ?)
-              RETURNING id
-            ''', (spectacle_id, name))
-            representation_id = cursor.fetchone()['id']
-            for representation_date in dates:
-                if not representation_date:
-                    continue
-                cursor.execute('''
-                  INSERT INTO representation_date (representation_id, date)
-                  VALUES (?, ?)
-                  RETURNING id
-                ''', (representation_id, representation_date))
-                representation_date_id = cursor.fetchone()['id']
-                for artist_id in artists:
-                    if not artist_id:
-                        continue
-                    cursor.execute('''
-                      INSERT INTO
-                        artist_representation_date
-                        (representation_date_id, artist_id)
-                      VALUES
-                        (?, ?)
-                    ''', (representation_date_id, artist_id))
+        representations = get_form_representations(request.form)
+        dates, artists = insert_representations(
+            cursor, spectacle_id, representations.values())
+        insert_representation_dates(cursor, dates, artists)
 
         cursor.connection.commit()
         flash('Le spectacle a été ajouté.')
@@ -680,21 +1523,52 @@ def spectacle_update(spectacle_id):
           WHERE id = :id
         ''', parameters)
 
+        # Only write rows that differ from what is stored
         for table in tables:
-            cursor.execute(
-                f'DELETE FROM {table}_spectacle WHERE spectacle_id = ?',
-                (spectacle_id,))
-            for table_id in request.form.getlist(f'{table}s'):
-                cursor.execute(f'''
-                  INSERT INTO {table}_spectacle ({table}_id, spectacle_id)
-                  VALUES (?, ?)
-                ''', (table_id, spectacle_id))
+            cursor.execute(f'''
+              SELECT {table}_id AS id
+              FROM {table}_spectacle
+              WHERE spectacle_id = ?
+            ''', (spectacle_id,))
+            old_ids = {row['id'] for row in cursor.fetchall()}
+            new_ids = {
+                int(table_id) for table_id in request.form.getlist(f'{table}s')
+                if table_id}
+            cursor.executemany(f'''
+              DELETE FROM {table}_spectacle
+              WHERE {table}_id = ?
+              AND spectacle_id = ?
+            ''', [(table_id, spectacle_id) for table_id in old_ids - new_ids])
+            cursor.executemany(f'''
+              INSERT INTO {table}_spectacle ({table}_id, spectacle_id)
+              VALUES (?, ?)
+            ''', [(table_id, spectacle_id) for table_id in new_ids - old_ids])
+
+        cursor.execute(
+            'SELECT artist_id FROM contract WHERE spectacle_id = ?',
+            (spectacle_id,))
+        old_contracts = {row['artist_id'] for row in cursor.fetchall()}
+        contracts = {
+            int(artist_id) for artist_id
+            in request.form.getlist('artist-contracts') if artist_id}
+        removed_contracts = old_contracts - contracts
+        added_contracts = contracts - old_contracts
+        cursor.executemany('''
+          DELETE FROM contract
+          WHERE spectacle_id = ?
+          AND artist_id = ?
+        ''', [(spectacle_id, contract) for contract in removed_contracts])
+        cursor.executemany('''
+          INSERT INTO contract (spectacle_id, artist_id)
+          VALUES (?, ?)
+        ''', [(spectacle_id, contract) for contract in added_contracts])
 
         cursor.execute('''
           SELECT
-            representation.id AS representation_id,
-            representation_date.id AS representation_date_id,
-            artist_representation_date.id AS artist_representation_date_id
+            representation.id,
+            representation.name,
+            representation_date.date,
+            artist_representation_date.artist_id
           FROM representation
           LEFT OUTER JOIN representation_date
           ON representation.id = representation_date.representation_id
@@ -705,69 +1579,91 @@ def spectacle_update(spectacle_id):
           WHERE
             representation.spectacle_id = ?
         ''', (spectacle_id,))
-        rows = cursor.fetchall()
-        artist_representation_date_ids = {
-            row['artist_representation_date_id'] for row in rows
-            if row['artist_representation_date_id']}
-        representation_date_ids = {
-            row['representation_date_id'] for row in rows
-            if row['representation_date_id']}
-        representation_ids = {
-            row['representation_id'] for row in rows
-            if row['representation_id']}
-        cursor.execute(
-            'DELETE FROM artist_representation_date WHERE id IN '
-            f'({",".join("?" * len(artist_representation_date_ids))})',
-            tuple(artist_representation_date_ids))
-        cursor.execute(
-            'DELETE FROM representation_date WHERE id IN '
-            f'({",".join("?" * len(representation_date_ids))})',
-            tuple(representation_date_ids))
-        cursor.execute(
-            'DELETE FROM representation WHERE id IN '
-            f'({",".join("?" * len(representation_ids))})',
-            tuple(representation_ids))
-
-        cursor.execute(
-            'DELETE FROM contract WHERE spectacle_id = ?', (spectacle_id,))
-        contracts = set(request.form.getlist('artist-contracts'))
-        for contract in contracts:
-            cursor.execute('''
-              INSERT INTO contract (spectacle_id, artist_id)
-              VALUES (?, ?)
-            ''', (spectacle_id, contract))
-
-        for key, name in request.form.items():
-            if not key.endswith('-name'):
+        old_representations = {}
+        for row in cursor.fetchall():
+            name, dates = old_representations.setdefault(
+                str(row['id']), (row['name'], {}))
+            if row['date']:
+                artists = dates.setdefault(row['date'].isoformat(), set())
+                if row['artist_id']:
+                    artists.add(row['artist_id'])
+
+        representations = get_form_representations(request.form)
+        removed_representations = [
+            (int(key),) for key in old_representations
+            if key not in representations]
+        renamed_representations = []
+        removed_dates, removed_artists = [], []
+        dates, artists = insert_representations(cursor, spectacle_id, [
+            representation for key, representation in representations.items()
+            if key not in old_representations])
+        for key, (name, new_dates, new_artists) in representations.items():
+            if key not in old_representations:
                 continue
-            key = key.split('-', 1)[0]
-            dates = request.form.getlist(f'{key}-dates')
-            artists = set(request.form.getlist(f'{key}-artists'))
-            cursor.execute('''
-              INSERT INTO representation (spectacle_id, name)
-              VALUES (?, ?)
-              RETURNING id
-            ''', (spectacle_id, name))
-            representation_id = cursor.fetchone()['id']
-            for representation_date in dates:
-                if not representation_date:
+            representation_id = int(key)
+            old_name, old_dates = old_representations[key]
+            if name != old_name:
+                renamed_representations.append((name, representation_id))
+            for day, old_artists in old_dates.items():
+                if day not in new_dates:
+                    removed_dates.append((representation_id, day))
                     continue
-                cursor.execute('''
-                  INSERT INTO representation_date (representation_id, date)
-                  VALUES (?, ?)
-                  RETURNING id
-                ''', (representation_id, representation_date))
-                representation_date_id = cursor.fetchone()['id']
-                for artist_id in artists:
-                    if not artist_id:
-                        continue
-                    cursor.execute('''
-                      INSERT INTO
-                        artist_representation_date
-                        (representation_date_id, artist_id)
-                      VALUES
-                        (?, ?)
-                    ''', (representation_date_id, artist_id))
+                removed_artists += [
+                    (artist_id, representation_id, day)
+                    for artist_id in old_artists - new_artists]
+            for day in new_dates:
+                if day not in old_dates:
+                    dates.append((representation_id, day))
+                artists += [
+                    (artist_id, representation_id, day)
+                    for artist_id in new_artists - old_dates.get(day, set())]
+
+        cursor.executemany('''
+          DELETE FROM artist_representation_date
+          WHERE representation_date_id IN (
+            SELECT id
+            FROM representation_date
+            WHERE representation_id = ?
+          )
+        ''', removed_representations)
+        cursor.executemany('''
+          DELETE FROM representation_date
+          WHERE representation_id = ?
+        ''', removed_representations)
+        cursor.executemany('''
+          DELETE FROM representation
+          WHERE id = ?
+        ''', removed_representations)
+        cursor.executemany('''
+          UPDATE representation
+          SET name = ?
+          WHERE id = ?
+        ''', renamed_representations)
+        cursor.executemany('''
+          DELETE FROM artist_representation_date
+          WHERE representation_date_id IN (
+            SELECT id
+            FROM representation_date
+            WHERE representation_id = ?
+            AND date = ?
+          )
+        ''', removed_dates)
+        cursor.executemany('''
+          DELETE FROM representation_date
+          WHERE representation_id = ?
+          AND date = ?
+        ''', removed_dates)
+        cursor.executemany('''
+          DELETE FROM artist_representation_date
+          WHERE artist_id = ?
+          AND representation_date_id IN (
+            SELECT id
+            FROM representation_date
+            WHERE representation_id = ?
+            AND date = ?
+          )
+        ''', removed_artists)
+        insert_representation_dates(cursor, dates, artists)
 
         cursor.connection.commit()
         flash('Les informations ont été sauvegardées.')
@@ -850,40 +1746,17 @@ def spectacle_remove(spectacle_id):
     cursor = get_connection().cursor()
     if request.method == 'POST':
         cursor.execute('''
-          DELETE FROM spectacle
-          WHERE id = :spectacle_id
-        ''', (spectacle_id,))
-        for table in ('sound', 'makeup', 'costume', 'vehicle', 'card', 'beeper'):
-            cursor.execute(f'''
-              DELETE FROM {table}_spectacle
-              WHERE spectacle_id = :spectacle_id
-            ''', (spectacle_id,))
-        cursor.execute('''
-          SELECT representation_date.id
-          FROM representation
-          JOIN representation_date
-          ON representation.id = representation_date.representation_id
-          WHERE spectacle_id = :spectacle_id
-        ''', (spectacle_id,))
-        representation_date_ids = tuple(row['id'] for row in cursor.fetchall())
-        cursor.execute(f'''
-          DELETE FROM artist_representation_date
-          WHERE representation_date_id
-          IN ({",".join("?" * len(representation_date_ids))})
-        ''', representation_date_ids)
-        cursor.execute(f'''
-          DELETE FROM representation_date
-          WHERE id IN ({",".join("?" * len(representation_date_ids))})
-        ''', representation_date_ids)
-        cursor.execute('''
-          DELETE FROM representation
-          WHERE spectacle_id = :spectacle_id
-        ''', (spectacle_id,))
-        cursor.execute('''
-          DELETE FROM contract
-          WHERE spectacle_id = :spectacle_id
+          SELECT filename
+          FROM spectacle_image
+          WHERE spectacle_id = ?
         ''', (spectacle_id,))
+        filenames = [row['filename'] for row in cursor.fetchall()]
+        # Children are removed by ON DELETE CASCADE foreign keys
+        cursor.execute('DELETE FROM spectacle WHERE id = ?', (spectacle_id,))
         cursor.connection.commit()
+        for filename in filenames:
+            for path in get_roadmap_image_paths(filename).values():
+                path.unlink(missing_ok=True)
         flash('Le spectacle a été supprimé.')
         return redirect(url_for('index'))
 
@@ -898,13 +1771,67 @@ def spectacle_remove(spectacle_id):
 
 # Roadmaps
 @app.route('/roadmap/<int:spectacle_id>')
+@read_only
 @authenticated
 def roadmap(spectacle_id):
     spectacle_data = get_spectacle_data(spectacle_id)
-    html = render_template('roadmap.jinja2.html', **spectacle_data)
     place = spectacle_data['representations'][0]['place'].lower()
-    return render_pdf(
-        HTML(string=html), download_filename=f'{secure_filename(place)}.pdf')
+
+    def send(path):
+        return send_file(
+            path, mimetype='application/pdf', as_attachment=True,
+            download_name=f'{secure_filename(place)}.pdf',
+            etag=path.stem.split('-', 1)[1], conditional=True)
+
+    return get_roadmap_pdf(spectacle_id, spectacle_data, send)
+
+
+@app.route('/roadmap/<int:spectacle_id>/job', methods=('POST',))
+@authenticated
+def roadmap_job_submit(spectacle_id):
+    spectacle_data = get_spectacle_data(spectacle_id)
+    if not spectacle_data['representations']:
+        return abort(404)
+    key, _ = submit_roadmap(spectacle_id, spectacle_data)
+    return roadmap_job(spectacle_id, key)
+
+
+@app.route('/roadmap/<int:spectacle_id>/job/<key>')
+@authenticated
+def roadmap_job(spectacle_id, key):
+    path = get_roadmap_path(spectacle_id, key)
+    status, error = get_roadmap_job_status(path)
+    if status is None:
+        return abort(404)
+    job = {
+        'id': key,
+        'status_url': url_for(
+            'roadmap_job', spectacle_id=spectacle_id, key=key),
+        'download_url': url_for(
+            'roadmap_job_download', spectacle_id=spectacle_id, key=key),
+    }
+    job['status'] = status
+    if error is not None:
+        job['error'] = error
+    return job
+
+
+@app.route('/roadmap/<int:spectacle_id>/job/<key>/pdf')
+@read_only
+@authenticated
+def roadmap_job_download(spectacle_id, key):
+    path = get_roadmap_path(spectacle_id, key)
+    cursor = get_connection().cursor()
+    cursor.execute('SELECT place FROM spectacle WHERE id = ?', (spectacle_id,))
+    place = (cursor.fetchone() or abort(404))['place'].lower()
+    try:
+        os.utime(path, (time(), path.stat().st_mtime))
+        return send_file(
+            path, mimetype='application/pdf', as_attachment=True,
+            download_name=f'{secure_filename(place)}.pdf', etag=key,
+            conditional=True)
+    except FileNotFoundError:
+        return abort(404)
 
 
 @app.route('/roadmap/<int:spectacle_id>/send', methods=('GET', 'POST'))
@@ -927,13 +1854,13 @@ def roadmap_send(spectacle_id):
             'Artistique: Isabelle CAHAGNE : 06 83 28 25 60\n'
             'http://mademoiselle-paillette.com'
         )
-        html = render_template('roadmap.jinja2.html', **spectacle_data)
-        pdf = HTML(string=html).write_pdf()
+        pdf = get_roadmap_pdf(spectacle_id, spectacle_data)
         attachments = {f'{place.lower()}.pdf': pdf}
         send_mail(to, subject, content, attachments)
         flash('La feuille de route a été envoyée.')
         return redirect(url_for('spectacle_update', spectacle_id=spectacle_id))
 
+    submit_roadmap(spectacle_id, spectacle_data)
     cursor = get_connection().cursor()
     cursor.execute('''
       SELECT name, mail
@@ -992,35 +1919,31 @@ def roadmap_comment(spectacle_id):
 def roadmap_attach_image(spectacle_id):
     images = request.files.getlist('images')
     if images:
-        cursor = get_connection().cursor()
+        folder = Path(app.static_folder) / 'roadmap_images' / 'originals'
+        folder.mkdir(parents=True, exist_ok=True)
+        filenames = []
         for image in images:
             filename = secure_filename(image.filename)
             if not filename:
                 continue
-            folder = Path(app.static_folder) / 'roadmap_images'
-            folder.mkdir(exist_ok=True)
             if filename.lower().endswith('.pdf'):
-                command = [
-                    'gs', '-q', '-dNOPAUSE', '-dBATCH', '-sDEVICE=png16m',
-                    '-r480.0', '-sOutputFile=-', '-']
-                input = image.stream.read()
-                pngs = run(command, input=input, stdout=PIPE).stdout
-                sub_images = []
-                for i, png in enumerate(pngs[8:].split(PNG_MAGIC_NUMBER)):
-                    filename = f'{filename[:-4]}-page{i}.png'
-                    (folder / filename).write_bytes(PNG_MAGIC_NUMBER + png)
-                    sub_images.append(filename)
+                with TemporaryDirectory() as directory:
+                    pdf_path = Path(directory) / 'upload.pdf'
+                    image.save(pdf_path)
+                    try:
+                        filenames += rasterize_pdf(
+                            pdf_path, folder, filename[:-4])
+                    except (CalledProcessError, TimeoutExpired, ValueError):
+                        flash(f'Le fichier {filename} n’a pas pu être lu.')
             else:
                 image.save(folder / filename)
-                sub_images = [filename]
-            for filename in sub_images:
-                with Image.open(folder / filename) as image:
-                    image.thumbnail((1000, 1000))
-                    image.save(folder / filename, optimize=True)
-                cursor.execute('''
-                  INSERT INTO spectacle_image (spectacle_id, filename)
-                  VALUES (?, ?)
-                ''', (spectacle_id, filename))
+                filenames.append(filename)
+        make_roadmap_images_variants(filenames)
+        cursor = get_connection().cursor()
+        cursor.executemany('''
+          INSERT INTO spectacle_image (spectacle_id, filename)
+          VALUES (?, ?)
+        ''', [(spectacle_id, filename) for filename in filenames])
         cursor.connection.commit()
         flash('Les images ont été ajoutées.')
     return redirect(url_for('roadmap_send', spectacle_id=spectacle_id))
@@ -1036,9 +1959,9 @@ def roadmap_detach_image(image_id):
       RETURNING spectacle_id, filename
     ''', (image_id,))
     image = cursor.fetchone() or abort(404)
-    path = Path(app.static_folder) / 'roadmap_images' / image['filename']
-    path.unlink(missing_ok=True)
     cursor.connection.commit()
+    for path in get_roadmap_image_paths(image['filename']).values():
+        path.unlink(missing_ok=True)
     flash('L’image a été supprimée.')
     spectacle_id = image['spectacle_id']
     return redirect(url_for('roadmap_send', spectacle_id=spectacle_id))
@@ -1047,28 +1970,32 @@ def roadmap_detach_image(image_id):
 # Follow-ups
 @app.route('/artists/followup')
 @app.route('/artists/followup/<int:year>/<int:month>')
+@app.route('/artists/followup/<int:year>/<int:month>/<int:months>')
+@read_only
 @authenticated
-def artists_followup(year=None, month=None):
-    year, month, start, stop, previous, next = get_date_data(year, month)
-
-    filter = session.get('artists-followup-filter')
+@conditional(
+    'artist', 'person', 'artist_availability', 'artist_representation_date',
+    'representation_date', 'representation', 'spectacle')
+def artists_followup(year=None, month=None, months=1):
+    year, month, start, stop, previous, next = get_date_data(
+        year, month, months)
 
     cursor = get_connection().cursor()
     cursor.execute('''
-      SELECT artist.id, date, available, available AS filter_column
+      SELECT artist.id, date, available
       FROM artist
       JOIN artist_availability
       ON artist.id = artist_availability.artist_id
       WHERE date BETWEEN ? AND ?
       UNION
-      SELECT artist.id, date, 1 AS available, 1 as filter_column
-      FROM artist
-      LEFT JOIN artist_representation_date
-      ON artist.id = artist_representation_date.artist_id
-      LEFT JOIN representation_date
+      SELECT artist.id, date, 1 AS available
+      FROM representation_date
+      JOIN artist_representation_date
       ON
         artist_representation_date.representation_date_id =
         representation_date.id
+      JOIN artist
+      ON artist.id = artist_representation_date.artist_id
       WHERE date BETWEEN ? AND ?
       ORDER BY artist.id, date
     ''', [start, stop] * 2)
@@ -1112,33 +2039,49 @@ def artists_followup(year=None, month=None):
     parameters = [start, stop]
     filter = session.get('artists-followup-filter')
     if filter:
+        # Values are given as a JSON array to keep a single statement
+        values = json.dumps(filter[1])
+        dates = (
+            start, stop, datetime.fromisoformat(filter[2]).date(),
+            datetime.fromisoformat(filter[3]).date())
         if filter[0] == 'availabilities':
-            filter_list = availabilities
+            query += '''
+              AND artist.id IN (
+                SELECT artist_id
+                FROM artist_availability
+                WHERE available IN (SELECT value FROM json_each(?))
+                AND date BETWEEN ? AND ?
+                AND date BETWEEN ? AND ?
+                UNION
+                SELECT artist_id
+                FROM representation_date
+                JOIN artist_representation_date
+                ON
+                  artist_representation_date.representation_date_id =
+                  representation_date.id
+                WHERE 1 IN (SELECT value FROM json_each(?))
+                AND date BETWEEN ? AND ?
+                AND date BETWEEN ? AND ?
+              )
+            '''
+            parameters += [values, *dates] * 2
         elif filter[0] == 'spectacles':
-            cursor.execute('''
-              SELECT artist.id AS id, date, spectacle.id AS filter_column
-              FROM artist
-              LEFT JOIN artist_representation_date
-              ON artist.id = artist_representation_date.artist_id
-              LEFT JOIN representation_date
-              ON
-                artist_representation_date.representation_date_id =
-                representation_date.id
-              LEFT JOIN representation
-              ON representation_date.representation_id = representation.id
-              LEFT JOIN spectacle
-              ON representation.spectacle_id = spectacle.id
-              WHERE date BETWEEN ? AND ?
-            ''', [start, stop])
-            filter_list = cursor.fetchall()
-        filter_start = datetime.fromisoformat(filter[2]).date()
-        filter_stop = datetime.fromisoformat(filter[3]).date()
-        artists = list({
-            row['id'] for row in filter_list
-            if row['filter_column'] in filter[1]
-            and filter_start <= row['date'] <= filter_stop}) or (0,)
-        query += f'AND artist.id IN ({",".join("?" * len(artists))})'
-        parameters += artists
+            query += '''
+              AND artist.id IN (
+                SELECT artist_id
+                FROM representation
+                JOIN representation_date
+                ON representation.id = representation_date.representation_id
+                JOIN artist_representation_date
+                ON
+                  artist_representation_date.representation_date_id =
+                  representation_date.id
+                WHERE spectacle_id IN (SELECT value FROM json_each(?))
+                AND date BETWEEN ? AND ?
+                AND date BETWEEN ? AND ?
+              )
+            '''
+            parameters += [values, *dates]
     query += '''
       ORDER BY grouper, date
     '''
@@ -1167,12 +2110,13 @@ def artists_followup(year=None, month=None):
         for day, representations
         in groupby(cursor.fetchall(), lambda row: row['date'])
     }
-    return render_template(
+    return stream_page(
         'artists_followup.jinja2.html',
         spectacles_by_grouper_by_day=spectacles_by_grouper_by_day,
         availabilities_by_artist_by_day=availabilities_by_artist_by_day,
         representation_dates_by_day=representation_dates_by_day,
-        start=start, stop=stop, previous=previous, next=next)
+        days=get_days(start, stop), months=months, start=start, stop=stop,
+        previous=previous, next=next)
 
 
 # Follow-ups
@@ -1180,7 +2124,9 @@ def artists_followup(year=None, month=None):
            methods=('GET', 'POST'))
 @authenticated
 def artists_followup_filter(year, month):
-    year, month, start, stop, previous, next = get_date_data(year, month)
+    months = request.args.get('months', 1, type=int)
+    year, month, start, stop, previous, next = get_date_data(
+        year, month, months)
     cursor = get_connection().cursor()
 
     if request.method == 'POST':
@@ -1202,7 +2148,8 @@ def artists_followup_filter(year, month):
                 session.pop('artists-followup-filter', None)
         except Exception:
             session.pop('artists-followup-filter', None)
-        return redirect(url_for('artists_followup', year=year, month=month))
+        return redirect(url_for(
+            'artists_followup', year=year, month=month, months=months))
 
     cursor.execute('''
       SELECT DISTINCT
@@ -1221,379 +2168,330 @@ def artists_followup_filter(year, month):
         start=start, stop=stop)
 
 
-@app.route('/costumes/followup')
-@app.route('/costumes/followup/<int:year>/<int:month>')
-@authenticated
-def costumes_followup(year=None, month=None):
-    year, month, start, stop, previous, next = get_date_data(year, month)
+def get_followup_cell_span(spectacle, day):
+    return {
+        'value': spectacle['trigram'],
+        'previous': (day - spectacle['date_from']).days,
+        'next': (spectacle['date_to'] - day).days,
+    }
+
+
+def get_followup_matrix(type, start, stop):
+    days = get_days(start, stop)
     cursor = get_connection().cursor()
-    cursor.execute('''
-      SELECT
-        costume.id AS costume_id,
-        costume.name || '-' || costume.id AS grouper,
-        costume.name,
-        costume.color,
-        spectacle.trigram,
-        spectacle.date_from,
-        spectacle.date_to
-      FROM costume
-      LEFT JOIN costume_spectacle
-      ON costume.id = costume_spectacle.costume_id
-      LEFT JOIN (
-        SELECT *
-        FROM spectacle
-        WHERE (date_from IS NULL AND date_to IS NULL)
-        OR date_from BETWEEN ? AND ?
-        OR date_to BETWEEN ? AND ?
-      ) AS spectacle
-      ON costume_spectacle.spectacle_id = spectacle.id
-      WHERE spectacle.trigram IS NOT NULL OR NOT costume.hidden
-      ''', (start, stop) * 2)  # Assume that spectacles last less than 1 month
-    costumes_spectacles = cursor.fetchall()
-    cursor.execute('''
+    parameters = {'start': start, 'stop': stop}
+    # Spectacles and links must be read from the same snapshot
+    cursor.execute('BEGIN')
+    cursor.execute(f'''
       SELECT id, date_from, date_to, trigram
       FROM spectacle
-      WHERE date_from BETWEEN ? AND ?
-      OR date_to BETWEEN ? AND ?
-    ''', (start, stop) * 2)
-    spectacle_dates = cursor.fetchall()
-    return render_template(
-        'costumes_followup.jinja2.html',
-        costumes_spectacles=costumes_spectacles,
-        spectacle_dates=spectacle_dates, start=start, stop=stop,
-        previous=previous, next=next)
+      WHERE id IN ({SPECTACLE_OVERLAP})
+      ORDER BY date_from, id
+    ''', parameters)
+    spectacles_by_day = [[] for day in days]
+    spans = {}
+    for spectacle in cursor.fetchall():
+        first = (max(spectacle['date_from'], start) - start).days
+        last = (min(spectacle['date_to'], stop) - start).days
+        spans[spectacle['id']] = (spectacle['trigram'], range(first, last + 1))
+        for i in spans[spectacle['id']][1]:
+            spectacles_by_day[i].append(spectacle)
+    cursor.execute(f'''
+      SELECT {type}_id AS resource_id, spectacle_id
+      FROM {type}_spectacle
+      WHERE spectacle_id IN ({SPECTACLE_OVERLAP})
+    ''', parameters)
+    trigrams_by_resource = {}
+    for link in cursor.fetchall():
+        trigram, span = spans[link['spectacle_id']]
+        trigrams_by_day = trigrams_by_resource.setdefault(
+            link['resource_id'], [[] for day in days])
+        for i in span:
+            trigrams_by_day[i].append(trigram)
+    cursor.execute(f'''
+      SELECT id, name, color, hidden
+      FROM {type}
+      ORDER BY name, id
+    ''')
+    all_resources = cursor.fetchall()
+    cursor.connection.commit()
+    resources = [
+        dict(resource, cells=[
+            ' '.join(trigrams) for trigrams in trigrams_by_resource.get(
+                resource['id'], [()] * len(days))])
+        for resource in all_resources
+        if resource['id'] in trigrams_by_resource or not resource['hidden']]
+    return days, spectacles_by_day, resources
+
+
+def render_followup(type, year, month, months):
+    year, month, start, stop, previous, next = get_date_data(
+        year, month, months)
+    days, spectacles_by_day, resources = get_followup_matrix(type, start, stop)
+    return stream_page(
+        'resources_followup.jinja2.html', type=type, days=days,
+        spectacles_by_day=spectacles_by_day, resources=resources,
+        months=months, start=start, stop=stop, previous=previous, next=next)
+
+
+@app.route('/costumes/followup')
+@app.route('/costumes/followup/<int:year>/<int:month>')
+@app.route('/costumes/followup/<int:year>/<int:month>/<int:months>')
+@read_only
+@authenticated
+@conditional('spectacle', 'costume', 'costume_spectacle')
+def costumes_followup(year=None, month=None, months=1):
+    return render_followup('costume', year, month, months)
 
 
 @app.route('/makeups/followup')
 @app.route('/makeups/followup/<int:year>/<int:month>')
+@app.route('/makeups/followup/<int:year>/<int:month>/<int:months>')
+@read_only
 @authenticated
-def makeups_followup(year=None, month=None):
-    year, month, start, stop, previous, next = get_date_data(year, month)
-    cursor = get_connection().cursor()
-    cursor.execute('''
-      SELECT
-        makeup.id AS makeup_id,
-        makeup.name || '-' || makeup.id AS grouper,
-        makeup.name,
-        makeup.color,
-        spectacle.trigram,
-        spectacle.date_from,
-        spectacle.date_to
-      FROM makeup
-      LEFT JOIN makeup_spectacle
-      ON makeup.id = makeup_spectacle.makeup_id
-      LEFT JOIN (
-        SELECT *
-        FROM spectacle
-        WHERE (date_from IS NULL AND date_to IS NULL)
-        OR date_from BETWEEN ? AND ?
-        OR date_to BETWEEN ? AND ?
-      ) AS spectacle
-      ON makeup_spectacle.spectacle_id = spectacle.id
-      WHERE spectacle.trigram IS NOT NULL OR NOT makeup.hidden
-    ''', (start, stop) * 2)  # Assume that spectacles last less than 1 month
-    makeups_spectacles = cursor.fetchall()
-    cursor.execute('''
-      SELECT id, date_from, date_to, trigram
-      FROM spectacle
-      WHERE date_from BETWEEN ? AND ?
-      OR date_to BETWEEN ? AND ?
-    ''', (start, stop) * 2)
-    spectacle_dates = cursor.fetchall()
-    return render_template(
-        'makeups_followup.jinja2.html',
-        makeups_spectacles=makeups_spectacles, spectacle_dates=spectacle_dates,
-        start=start, stop=stop, previous=previous, next=next)
+@conditional('spectacle', 'makeup', 'makeup_spectacle')
+def makeups_followup(year=None, month=None, months=1):
+    return render_followup('makeup', year, month, months)
 
 
 @app.route('/sounds/followup')
 @app.route('/sounds/followup/<int:year>/<int:month>')
+@app.route('/sounds/followup/<int:year>/<int:month>/<int:months>')
+@read_only
 @authenticated
-def sounds_followup(year=None, month=None):
-    year, month, start, stop, previous, next = get_date_data(year, month)
-    cursor = get_connection().cursor()
-    cursor.execute('''
-      SELECT
-        sound.id AS sound_id,
-        sound.name || '-' || sound.id AS grouper,
-        sound.name,
-        sound.color,
-        spectacle.trigram,
-        spectacle.date_from,
-        spectacle.date_to
-      FROM sound
-      LEFT JOIN sound_spectacle
-      ON sound.id = sound_spectacle.sound_id
-      LEFT JOIN (
-        SELECT *
-        FROM spectacle
-        WHERE (date_from IS NULL AND date_to IS NULL)
-        OR date_from BETWEEN ? AND ?
-        OR date_to BETWEEN ? AND ?
-      ) AS spectacle
-      ON sound_spectacle.spectacle_id = spectacle.id
-      WHERE spectacle.trigram IS NOT NULL OR NOT sound.hidden
-    ''', (start, stop) * 2)  # Assume that spectacles last less than 1 month
-    sounds_spectacles = cursor.fetchall()
-    cursor.execute('''
-      SELECT id, date_from, date_to, trigram
-      FROM spectacle
-      WHERE date_from BETWEEN ? AND ?
-      OR date_to BETWEEN ? AND ?
-    ''', (start, stop) * 2)
-    spectacle_dates = cursor.fetchall()
-    return render_template(
-        'sounds_followup.jinja2.html',
-        sounds_spectacles=sounds_spectacles, spectacle_dates=spectacle_dates,
-        start=start, stop=stop, previous=previous, next=next)
+@conditional('spectacle', 'sound', 'sound_spectacle')
+def sounds_followup(year=None, month=None, months=1):
+    return render_followup('sound', year, month, months)
 
 
 @app.route('/vehicles/followup')
 @app.route('/vehicles/followup/<int:year>/<int:month>')
+@app.route('/vehicles/followup/<int:year>/<int:month>/<int:months>')
+@read_only
 @authenticated
-def vehicles_followup(year=None, month=None):
-    year, month, start, stop, previous, next = get_date_data(year, month)
-    cursor = get_connection().cursor()
-    cursor.execute('''
-      SELECT
-        vehicle.id AS vehicle_id,
-        vehicle.name || '-' || vehicle.id AS grouper,
-        vehicle.name,
-        vehicle.color,
-        spectacle.trigram,
-        spectacle.date_from,
-        spectacle.date_to
-      FROM vehicle
-      LEFT JOIN vehicle_spectacle
-      ON vehicle.id = vehicle_spectacle.vehicle_id
-      LEFT JOIN (
-        SELECT *
-        FROM spectacle
-        WHERE (date_from IS NULL AND date_to IS NULL)
-        OR date_from BETWEEN ? AND ?
-        OR date_to BETWEEN ? AND ?
-      ) AS spectacle
-      ON vehicle_spectacle.spectacle_id = spectacle.id
-      WHERE spectacle.trigram IS NOT NULL OR NOT vehicle.hidden
-    ''', (start, stop) * 2)  # Assume that spectacles last less than 1 month
-    vehicles_spectacles = cursor.fetchall()
-    cursor.execute('''
-      SELECT id, date_from, date_to, trigram
-      FROM spectacle
-      WHERE date_from BETWEEN ? AND ?
-      OR date_to BETWEEN ? AND ?
-    ''', (start, stop) * 2)
-    spectacle_dates = cursor.fetchall()
-    return render_template(
-        'vehicles_followup.jinja2.html',
-        vehicles_spectacles=vehicles_spectacles,
-        spectacle_dates=spectacle_dates, start=start, stop=stop,
-        previous=previous, next=next)
+@conditional('spectacle', 'vehicle', 'vehicle_spectacle')
+def vehicles_followup(year=None, month=None, months=1):
+    return render_followup('vehicle', year, month, months)
 
 
 @app.route('/cards/followup')
 @app.route('/cards/followup/<int:year>/<int:month>')
+@app.route('/cards/followup/<int:year>/<int:month>/<int:months>')
+@read_only
 @authenticated
-def cards_followup(year=None, month=None):
-    year, month, start, stop, previous, next = get_date_data(year, month)
-    cursor = get_connection().cursor()
-    cursor.execute('''
-      SELECT
-        card.id AS card_id,
-        card.name || '-' || card.id AS grouper,
-        card.name,
-        card.color,
-        spectacle.trigram,
-        spectacle.date_from,
-        spectacle.date_to
-      FROM card
-      LEFT JOIN card_spectacle
-      ON card.id = card_spectacle.card_id
-      LEFT JOIN (
-        SELECT *
-        FROM spectacle
-        WHERE (date_from IS NULL AND date_to IS NULL)
-        OR date_from BETWEEN ? AND ?
-        OR date_to BETWEEN ? AND ?
-      ) AS spectacle
-      ON card_spectacle.spectacle_id = spectacle.id
-      WHERE spectacle.trigram IS NOT NULL OR NOT card.hidden
-    ''', (start, stop) * 2)  # Assume that spectacles last less than 1 month
-    cards_spectacles = cursor.fetchall()
-    cursor.execute('''
-      SELECT id, date_from, date_to, trigram
-      FROM spectacle
-      WHERE date_from BETWEEN ? AND ?
-      OR date_to BETWEEN ? AND ?
-    ''', (start, stop) * 2)
-    spectacle_dates = cursor.fetchall()
-    return render_template(
-        'cards_followup.jinja2.html',
-        cards_spectacles=cards_spectacles,
-        spectacle_dates=spectacle_dates, start=start, stop=stop,
-        previous=previous, next=next)
+@conditional('spectacle', 'card', 'card_spectacle')
+def cards_followup(year=None, month=None, months=1):
+    return render_followup('card', year, month, months)
 
 
 @app.route('/beepers/followup')
 @app.route('/beepers/followup/<int:year>/<int:month>')
+@app.route('/beepers/followup/<int:year>/<int:month>/<int:months>')
+@read_only
 @authenticated
-def beepers_followup(year=None, month=None):
-    year, month, start, stop, previous, next = get_date_data(year, month)
-    cursor = get_connection().cursor()
-    cursor.execute('''
-      SELECT
-        beeper.id AS beeper_id,
-        beeper.name || '-' || beeper.id AS grouper,
-        beeper.name,
-        beeper.color,
-        spectacle.trigram,
-        spectacle.date_from,
-        spectacle.date_to
-      FROM beeper
-      LEFT JOIN beeper_spectacle
-      ON beeper.id = beeper_spectacle.beeper_id
-      LEFT JOIN (
-        SELECT *
-        FROM spectacle
-        WHERE (date_from IS NULL AND date_to IS NULL)
-        OR date_from BETWEEN ? AND ?
-        OR date_to BETWEEN ? AND ?
-      ) AS spectacle
-      ON beeper_spectacle.spectacle_id = spectacle.id
-      WHERE spectacle.trigram IS NOT NULL OR NOT beeper.hidden
-    ''', (start, stop) * 2)  # Assume that spectacles last less than 1 month
-    beepers_spectacles = cursor.fetchall()
-    cursor.execute('''
-      SELECT id, date_from, date_to, trigram
-      FROM spectacle
-      WHERE date_from BETWEEN ? AND ?
-      OR date_to BETWEEN ? AND ?
-    ''', (start, stop) * 2)
-    spectacle_dates = cursor.fetchall()
-    return render_template(
-        'beepers_followup.jinja2.html',
-        beepers_spectacles=beepers_spectacles,
-        spectacle_dates=spectacle_dates, start=start, stop=stop,
-        previous=previous, next=next)
+@conditional('spectacle', 'beeper', 'beeper_spectacle')
+def beepers_followup(year=None, month=None, months=1):
+    return render_followup('beeper', year, month, months)
 
 
-@app.route('/availabilities/<int:artist_id>/<date>/update',
-           methods=('POST',))
-@authenticated
-def availabilities_update(artist_id, date):
+def update_availabilities(artist_id, date_from, date_to, available,
+                          representation_date_id):
     cursor = get_connection().cursor()
+    if representation_date_id:
+        # Assign the same representation on each of its dates in the range
+        cursor.execute('''
+          SELECT representation_date.id, date, trigram
+          FROM representation_date
+          JOIN representation
+          ON representation_date.representation_id = representation.id
+          JOIN spectacle
+          ON representation.spectacle_id = spectacle.id
+          WHERE representation.id = (
+            SELECT representation_id
+            FROM representation_date
+            WHERE id = ?
+          )
+          AND date BETWEEN ? AND ?
+        ''', (representation_date_id, date_from, date_to))
+        representation_dates = cursor.fetchall()
+        values = {row['date']: row['trigram'] for row in representation_dates}
+    else:
+        value = str(int(available)) if available else ''
+        values = {day: value for day in get_days(date_from, date_to)}
 
-    parameters = dict(request.form)
-    parameters['artist_id'] = artist_id
-    parameters['date'] = date
-
-    return_value = ''
-
-    cursor.execute('''
+    days = [(artist_id, day) for day in values]
+    cursor.executemany('''
       DELETE FROM artist_representation_date
-      WHERE id IN (
-        SELECT artist_representation_date.id
-        FROM artist_representation_date
-        JOIN representation_date
-        ON
-          artist_representation_date.representation_date_id =
-          representation_date.id
-        WHERE artist_id = :artist_id
-        AND date = :date
+      WHERE artist_id = ?
+      AND representation_date_id IN (
+        SELECT id
+        FROM representation_date
+        WHERE date = ?
       )
-    ''', parameters)
-    if parameters['representation_date_id']:
-        cursor.execute('''
+    ''', days)
+    cursor.executemany('''
+      DELETE FROM artist_availability
+      WHERE artist_id = ?
+      AND date = ?
+    ''', days)
+    if representation_date_id:
+        cursor.executemany('''
           INSERT INTO
             artist_representation_date(artist_id, representation_date_id)
           VALUES
-            (:artist_id, :representation_date_id)
-        ''', parameters)
-        cursor.execute('''
-          SELECT trigram
-          FROM spectacle
-          JOIN representation
-          ON spectacle.id = representation.spectacle_id
-          JOIN representation_date
-          ON representation.id = representation_date.representation_id
-          WHERE representation_date.id = ?
-        ''', (parameters['representation_date_id'],))
-        return_value = cursor.fetchone()['trigram']
-
-    cursor.execute('''
-      DELETE FROM artist_availability
-      WHERE artist_id = :artist_id
-      AND date = :date
-    ''', parameters)
-    if parameters['available']:
-        return_value = return_value or str(int(parameters['available']))
-        cursor.execute('''
+            (?, ?)
+        ''', [(artist_id, row['id']) for row in representation_dates])
+    elif available:
+        cursor.executemany('''
           INSERT INTO artist_availability(artist_id, date, available)
-          VALUES (:artist_id, :date, :available)
-        ''', parameters)
+          VALUES (?, ?, ?)
+        ''', [(*day, available) for day in days])
 
     cursor.connection.commit()
-    return {'value': return_value}
+    return {day.isoformat(): value for day, value in values.items()}
 
 
-@app.route('/followup/<type>/<int:id>/<date>/update', methods=('POST',))
+@app.route('/availabilities/<int:artist_id>/<date>/update',
+           methods=('POST',))
 @authenticated
-def followup_update(type, id, date):
-    if type not in ('vehicle', 'makeup', 'sound', 'costume', 'card', 'beeper'):
-        return abort(404)
+def availabilities_update(artist_id, date):
+    date = datetime.fromisoformat(date).date()
+    values = update_availabilities(
+        artist_id, date, date, request.form['available'],
+        request.form['representation_date_id'])
+    return {'value': values.get(date.isoformat(), '')}
+
 
+@app.route('/availabilities/<int:artist_id>/<date_from>/<date_to>/update',
+           methods=('POST',))
+@authenticated
+def availabilities_range_update(artist_id, date_from, date_to):
+    date_from = datetime.fromisoformat(date_from).date()
+    date_to = datetime.fromisoformat(date_to).date()
+    values = update_availabilities(
+        artist_id, date_from, date_to, request.form['available'],
+        request.form['representation_date_id'])
+    return {'values': values}
+
+
+def update_followup_cells(edits):
     cursor = get_connection().cursor()
+    results = []
+    # Overlapping clears in a batch report each removed spectacle once
+    removed_spectacles = set()
+    # Consecutive edits of the same kind share one executemany call
+    for (type, add), group in groupby(
+            edits, lambda edit: (edit['type'], bool(edit['spectacle_id']))):
+        group = list(group)
+        if add:
+            cursor.executemany(f'''
+              INSERT INTO {type}_spectacle ({type}_id, spectacle_id)
+              VALUES (:id, :spectacle_id)
+            ''', group)
+            for edit in group:
+                removed_spectacles.discard(
+                    (type, edit['id'], edit['spectacle_id']))
+                cursor.execute('''
+                  SELECT trigram, date_from, date_to
+                  FROM spectacle
+                  WHERE id = :spectacle_id
+                ''', edit)
+                added = get_followup_cell_span(cursor.fetchone(), edit['date'])
+                results.append({**added, 'removed': []})
+        else:
+            for edit in group:
+                cursor.execute(f'''
+                  SELECT DISTINCT spectacle.id, trigram, date_from, date_to
+                  FROM spectacle
+                  JOIN {type}_spectacle
+                  ON spectacle.id = {type}_spectacle.spectacle_id
+                  WHERE {type}_id = :id
+                  AND spectacle.id IN ({SPECTACLE_OVERLAP})
+                ''', edit)
+                removed = []
+                for spectacle in cursor.fetchall():
+                    key = (type, edit['id'], spectacle['id'])
+                    if key not in removed_spectacles:
+                        removed_spectacles.add(key)
+                        removed.append(
+                            get_followup_cell_span(spectacle, edit['date']))
+                results.append({
+                    'value': '', 'previous': 0, 'next': 0,
+                    'removed': removed})
+            cursor.executemany(f'''
+              DELETE FROM {type}_spectacle
+              WHERE {type}_id = :id
+              AND spectacle_id IN ({SPECTACLE_OVERLAP})
+            ''', group)
+    cursor.connection.commit()
+    return results
 
-    parameters = dict(request.form)
-    parameters['id'] = id
-    parameters['date'] = date
+
+def get_followup_edit(type, id, date, spectacle_id):
+    if type not in FOLLOWUP_TYPES:
+        return abort(404)
     date = datetime.fromisoformat(date).date()
+    spectacle_id = int(spectacle_id) if spectacle_id else None
+    return {
+        'type': type, 'id': int(id), 'date': date, 'start': date,
+        'stop': date, 'spectacle_id': spectacle_id}
 
-    if parameters['spectacle_id']:
-        cursor.execute(f'''
-          INSERT INTO {type}_spectacle ({type}_id, spectacle_id)
-          VALUES (:id, :spectacle_id)
-        ''', parameters)
-        cursor.execute('''
-          SELECT trigram, date_from, date_to
-          FROM spectacle
-          WHERE id = :spectacle_id
-        ''', parameters)
-        spectacle = cursor.fetchone()
-        return_value = spectacle['trigram']
-        previous = (date - spectacle['date_from']).days
-        next = (spectacle['date_to'] - date).days
-        removed = []
-    else:
-        cursor.execute(f'''
-          DELETE FROM {type}_spectacle
-          WHERE {type}_id = :id
-          AND spectacle_id IN (
-            SELECT id
-            FROM spectacle
-            WHERE :date BETWEEN date_from AND date_to
-          )
-          RETURNING spectacle_id
-        ''', parameters)
-        spectacle_ids = tuple(row['spectacle_id'] for row in cursor.fetchall())
-        cursor.execute(
-            'SELECT trigram, date_from, date_to FROM spectacle WHERE id IN '
-            f'({",".join("?" * len(spectacle_ids))})',
-            tuple(spectacle_ids))
-        removed = tuple({
-            'value': spectacle['trigram'],
-            'previous': (date - spectacle['date_from']).days,
-            'next': (spectacle['date_to'] - date).days,
-        } for spectacle in cursor.fetchall())
-        return_value, previous, next = '', 0, 0
 
+@app.route('/followup/<type>/<int:id>/<date>/update', methods=('POST',))
+@authenticated
+def followup_update(type, id, date):
+    edit = get_followup_edit(type, id, date, request.form['spectacle_id'])
+    return update_followup_cells([edit])[0]
+
+
+@app.route('/followup/update', methods=('POST',))
+@authenticated
+def followup_batch_update():
+    edits = request.get_json(silent=True)
+    if not isinstance(edits, list):
+        return abort(400)
+    try:
+        edits = [
+            get_followup_edit(
+                edit['type'], edit['id'], edit['date'], edit['spectacle_id'])
+            for edit in edits]
+    except (KeyError, TypeError, ValueError):
+        return abort(400)
+    return update_followup_cells(edits)
+
+
+# Mails
+@app.route('/mails')
+@authenticated
+def mails():
+    cursor = get_connection().cursor()
+    cursor.execute('''
+      SELECT id, recipients, subject, status, attempts, error, created,
+        next_attempt, sent
+      FROM mail
+      WHERE status != 'sent' OR sent >= ?
+      ORDER BY id DESC
+    ''', (datetime.now() - timedelta(days=7),))
+    mails = cursor.fetchall()
+    return render_template('mails.jinja2.html', mails=mails)
+
+
+@app.route('/mail/<int:mail_id>/retry', methods=('POST',))
+@authenticated
+def mail_retry(mail_id):
+    cursor = get_connection().cursor()
+    cursor.execute('''
+      UPDATE mail
+      SET status = 'pending', attempts = 0, next_attempt = ?
+      WHERE id = ?
+      AND status = 'failed'
+    ''', (datetime.now(), mail_id))
     cursor.connection.commit()
-    return {
-        'value': return_value,
-        'previous': previous,
-        'next': next,
-        'removed': removed,
-    }
+    if app.config['MAIL_WORKER']:
+        start_mail_worker()
+    mail_event.set()
+    flash('Le message va être renvoyé.')
+    return redirect(url_for('mails'))
 
 
 # Persons
@@ -1648,6 +2546,7 @@ def person_update(person_id=None):
 
 @app.route('/persons')
 @authenticated
+@conditional('person', 'artist')
 def persons():
     cursor = get_connection().cursor()
     cursor.execute('''
@@ -1691,6 +2590,7 @@ def person_create():
 # Costumes
 @app.route('/costumes')
 @authenticated
+@conditional('costume')
 def costumes():
     cursor = get_connection().cursor()
     cursor.execute('SELECT * FROM costume ORDER BY name')
@@ -1740,6 +2640,7 @@ def costume_create():
 # Make-ups
 @app.route('/makeups')
 @authenticated
+@conditional('makeup')
 def makeups():
     cursor = get_connection().cursor()
     cursor.execute('SELECT * FROM makeup ORDER BY name')
@@ -1789,6 +2690,7 @@ def makeup_create():
 # Sounds
 @app.route('/sounds')
 @authenticated
+@conditional('sound')
 def sounds():
     cursor = get_connection().cursor()
     cursor.execute('SELECT * FROM sound ORDER BY name')
@@ -1838,6 +2740,7 @@ def sound_create():
 # Vehicles
 @app.route('/vehicles')
 @authenticated
+@conditional('vehicle')
 def vehicles():
     cursor = get_connection().cursor()
     cursor.execute('SELECT * FROM vehicle ORDER BY name')
@@ -1907,6 +2810,7 @@ def vehicle_create():
 # Artists
 @app.route('/artists')
 @authenticated
+@conditional('artist', 'person')
 def artists():
     cursor = get_connection().cursor()
     cursor.execute('''
@@ -1999,6 +2903,7 @@ def artist_create():
 # Credit cards
 @app.route('/cards')
 @authenticated
+@conditional('card')
 def cards():
     cursor = get_connection().cursor()
     cursor.execute('SELECT * FROM card ORDER BY name')
@@ -2048,6 +2953,7 @@ def card_create():
 # Make-ups
 @app.route('/beepers')
 @authenticated
+@conditional('beeper')
 def beepers():
     cursor = get_connection().cursor()
     cursor.execute('SELECT * FROM beeper ORDER BY name')
@@ -2092,3 +2998,12 @@ def beeper_create():
         return redirect(url_for('beepers'))
 
     return render_template('beeper_create.jinja2.html')
+
+
+# Warm up once all template filters are registered
+get_assets()
+load_templates(app.config['PRELOAD_TEMPLATES'])
+
+# Send the mails left pending by a previous run
+if app.config['MAIL_WORKER'] and Path(app.config['DB']).exists():
+    start_mail_worker()
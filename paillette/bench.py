@@ -0,0 +1,845 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+from functools import partial
+from html.parser import HTMLParser
+from http.cookiejar import CookieJar
+from pathlib import Path
+from platform import python_version
+from random import Random
+from socketserver import StreamRequestHandler, ThreadingTCPServer
+from statistics import median, quantiles
+from subprocess import CalledProcessError, run
+from tempfile import TemporaryDirectory
+from threading import Event, Lock, Thread
+from time import perf_counter
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import (
+    HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener)
+from uuid import uuid4
+
+import click
+from flask import g, got_request_exception, request, url_for
+from flask.cli import AppGroup
+from werkzeug.security import generate_password_hash
+from werkzeug.serving import make_server
+
+from . import (
+    FOLLOWUP_TYPES, SPECTACLE_OVERLAP, add_months, app, get_followup_matrix,
+    get_pool, get_spectacle_data, get_spectacles, mail_event, migrate, pools)
+
+cli = AppGroup('bench', help='Benchmark and load-test tools.')
+
+
+def generate_data(path, start_year, years, spectacles, artists, items, seed):
+    random = Random(seed)
+    start = date(start_year, 1, 1)
+    days = (date(start_year + years, 1, 1) - start).days
+    connection = sqlite3.connect(path)
+    model = Path(app.root_path).parent / 'sql' / 'model.sql'
+    connection.executescript(model.read_text())
+    cursor = connection.cursor()
+
+    firstnames = (
+        'Élodie', 'Isabelle', 'Amandine', 'Lucile', 'Fabrice', 'Samantha',
+        'Claire', 'Charly', 'Bertrand', 'Julien', 'Manon', 'Hugo')
+    lastnames = (
+        'Dulac', 'Leclerc', 'Camala', 'Gérin', 'Duplan', 'Labale',
+        'Touillat', 'Perdon', 'Klamir', 'Morel', 'Fabre', 'Roux')
+    places = (
+        'Chamonix', 'Besançon', 'Paris', 'Grenoble', 'Lyon', 'Annecy',
+        'Valence', 'Dijon', 'Marseille', 'Nantes', 'Lille', 'Rennes')
+    events = (
+        'Vive le printemps', 'Fête de la ville', 'Carnaval', 'Défilé',
+        'Festival de rue', 'Marché de Noël', 'Fête de la musique')
+    names = (
+        'Les sorcières', 'Échasses de rue', 'La grande bulle', 'Défilé',
+        'Déambulations', 'Parade lumineuse')
+
+    def color():
+        return f'#{random.randrange(0x1000000):06x}'
+
+    # Staff members are the first persons, artists follow
+    cursor.executemany('''
+      INSERT INTO person (id, mail, firstname, lastname, phone)
+      VALUES (?, ?, ?, ?, ?)
+    ''', [
+        (id, f'personne{id}@example.com', random.choice(firstnames),
+         random.choice(lastnames), f'01 23 45 {id // 100 % 100:02} '
+         f'{id % 100:02}')
+        for id in range(1, artists + 6)])
+    cursor.executemany('''
+      INSERT INTO artist (id, person_id, color) VALUES (?, ?, ?)
+    ''', [(id, id + 5, color()) for id in range(1, artists + 1)])
+    for type in FOLLOWUP_TYPES:
+        extra = ', rented' if type == 'vehicle' else ''
+        cursor.executemany(f'''
+          INSERT INTO {type} (id, name, color{extra})
+          VALUES (?, ?, ?{', FALSE' if extra else ''})
+        ''', [
+            (id, f'{type.capitalize()} {id}', color() if id % 3 else None)
+            for id in range(1, items + 1)])
+
+    spectacle_rows, contract_rows, link_rows = [], [], {}
+    representation_rows, date_rows, assignment_rows = [], [], []
+    availabilities = {}
+    for spectacle_id in range(1, spectacles + 1):
+        # Most spectacles start on weekends and last a few days
+        date_from = start + timedelta(days=random.randrange(days))
+        while date_from.weekday() < 4 and random.random() < 0.7:
+            date_from += timedelta(days=1)
+        length = random.choices((1, 2, 3, 5, 7), (5, 4, 3, 2, 1))[0]
+        spectacle_days = [
+            date_from + timedelta(days=day) for day in range(length)]
+        place = random.choice(places)
+        spectacle_rows.append((
+            spectacle_id, random.choice(events), place,
+            f'{random.randrange(1, 6)} artistes', place[:3].upper(),
+            spectacle_days[0], spectacle_days[-1]))
+        contracts = random.sample(
+            range(1, artists + 1), min(artists, random.randrange(2, 7)))
+        contract_rows.extend(
+            (artist_id, spectacle_id) for artist_id in contracts)
+        for type in FOLLOWUP_TYPES:
+            link_rows.setdefault(type, []).extend(
+                (item_id, spectacle_id) for item_id in random.sample(
+                    range(1, items + 1), min(items, random.randrange(4))))
+        for name in random.sample(names, random.randrange(1, 4)):
+            representation_id = len(representation_rows) + 1
+            representation_rows.append((representation_id, spectacle_id, name))
+            for day in spectacle_days:
+                if len(spectacle_days) > 1 and random.random() < 0.3:
+                    continue
+                date_id = len(date_rows) + 1
+                date_rows.append((date_id, representation_id, day))
+                for artist_id in random.sample(
+                        contracts, random.randrange(1, len(contracts) + 1)):
+                    assignment_rows.append((artist_id, date_id))
+                    availabilities[artist_id, day] = True
+
+    # Artists fill their availabilities for about a third of the days
+    for artist_id in range(1, artists + 1):
+        for day in range(days):
+            if random.random() < 0.3:
+                availabilities.setdefault(
+                    (artist_id, start + timedelta(days=day)),
+                    random.random() < 0.8)
+
+    cursor.executemany('''
+      INSERT INTO spectacle (
+        id, event, place, configuration, trigram, date_from, date_to)
+      VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', spectacle_rows)
+    cursor.executemany('''
+      INSERT INTO contract (artist_id, spectacle_id) VALUES (?, ?)
+    ''', contract_rows)
+    for type, rows in link_rows.items():
+        cursor.executemany(f'''
+          INSERT INTO {type}_spectacle ({type}_id, spectacle_id)
+          VALUES (?, ?)
+        ''', rows)
+    cursor.executemany('''
+      INSERT INTO representation (id, spectacle_id, name) VALUES (?, ?, ?)
+    ''', representation_rows)
+    cursor.executemany('''
+      INSERT INTO representation_date (id, representation_id, date)
+      VALUES (?, ?, ?)
+    ''', date_rows)
+    cursor.executemany('''
+      INSERT INTO artist_representation_date (
+        artist_id, representation_date_id)
+      VALUES (?, ?)
+    ''', assignment_rows)
+    cursor.executemany('''
+      INSERT INTO artist_availability (artist_id, date, available)
+      VALUES (?, ?, ?)
+    ''', sorted(
+        (artist_id, day, available)
+        for (artist_id, day), available in availabilities.items()))
+    connection.commit()
+    connection.close()
+
+
+@cli.command('generate-data')
+@click.argument('path', type=click.Path(exists=False, dir_okay=False))
+@click.option('--start-year', type=int, default=date.today().year - 9)
+@click.option('--years', type=int, default=10)
+@click.option('--spectacles', type=int, default=5000)
+@click.option('--artists', type=int, default=200)
+@click.option('--items', type=int, default=100)
+@click.option('--seed', type=int, default=0)
+def generate_data_command(path, **options):
+    """Create a database filled with synthetic data."""
+    if Path(path).exists():
+        raise click.UsageError(f'{path} already exists')
+    generate_data(path, **options)
+
+
+def backup_database(database, path):
+    with sqlite3.connect(database) as source, sqlite3.connect(path) as copy:
+        source.backup(copy)
+    copy.close()
+    source.close()
+
+
+def copy_database(database, folder):
+    path = str(Path(folder) / 'paillette.db')
+    backup_database(database, path)
+    migrate(path)
+    return path
+
+
+def close_pools(database):
+    for read_only in (False, True):
+        pool = pools.pop((database, read_only), None)
+        while pool and not pool.connections.empty():
+            pool.connections.get_nowait().close()
+
+
+def parse_server_timing(header):
+    timings = {}
+    for metric in header.split(','):
+        name, *parameters = metric.strip().split(';')
+        timings[name] = dict(
+            parameter.split('=', 1) for parameter in parameters)
+    return timings
+
+
+# Each call gets its own application context, even in the CLI one
+def benchmark_route(client, method, url, **kwargs):
+    with app.app_context():
+        start = perf_counter()
+        response = client.open(url, method=method, **kwargs)
+        response.get_data()
+        duration = (perf_counter() - start) * 1000
+    if response.status_code >= 400:
+        raise click.ClickException(
+            f'{method} {url} returned {response.status_code}')
+    timings = parse_server_timing(response.headers['Server-Timing'])
+    db = timings.get('db', {'dur': 0, 'desc': '0 queries'})
+    queries = int(db['desc'].strip('"').split()[0])
+    return duration, queries, float(db['dur'])
+
+
+def benchmark_write(snapshot, *args, **kwargs):
+    # Each sample starts from the same data
+    close_pools(app.config['DB'])
+    backup_database(snapshot, app.config['DB'])
+    return benchmark_route(*args, **kwargs)
+
+
+def benchmark_function(function, *args):
+    with app.app_context(), app.test_request_context():
+        start = perf_counter()
+        function(*args)
+        duration = (perf_counter() - start) * 1000
+        queries = g.connection.queries
+        return (
+            duration, len(queries),
+            sum(query['duration'] for query in queries))
+
+
+def get_benchmark_values(cursor):
+    values = {'months': 12, 'type': 'costume'}
+    for table in ('person', 'artist', *FOLLOWUP_TYPES):
+        cursor.execute(f'SELECT min(id) FROM {table}')
+        values[f'{table}_id'] = cursor.fetchone()[0]
+    values['id'] = values['costume_id']
+
+    # Busiest spectacle and month give the heaviest pages
+    cursor.execute('''
+      SELECT representation.spectacle_id
+      FROM artist_representation_date
+      JOIN representation_date
+      ON representation_date.id =
+        artist_representation_date.representation_date_id
+      JOIN representation
+      ON representation.id = representation_date.representation_id
+      GROUP BY representation.spectacle_id
+      ORDER BY count(*) DESC
+      LIMIT 1
+    ''')
+    values['spectacle_id'] = (cursor.fetchone() or (None,))[0]
+    cursor.execute('''
+      SELECT strftime('%Y', date) AS year, strftime('%m', date) AS month
+      FROM representation_date
+      GROUP BY year, month
+      ORDER BY count(*) DESC
+      LIMIT 1
+    ''')
+    year, month = cursor.fetchone() or (date.today().year, 1)
+    values['year'], values['month'] = int(year), int(month)
+    return {key: value for key, value in values.items() if value is not None}
+
+
+def run_benchmarks(repeat, snapshot):
+    cursor = get_pool().connect().cursor()
+    values = get_benchmark_values(cursor)
+    cursor.execute(
+        'SELECT date_from, date_to FROM spectacle WHERE id = ?',
+        (values.get('spectacle_id'),))
+    spectacle_dates = cursor.fetchone()
+    # Resources not booked yet for the spectacle, to avoid duplicate links
+    edits = []
+    for type in FOLLOWUP_TYPES if spectacle_dates else ():
+        cursor.execute(f'''
+          SELECT id
+          FROM {type}
+          WHERE id NOT IN (
+            SELECT {type}_id FROM {type}_spectacle WHERE spectacle_id = ?)
+          LIMIT 5
+        ''', (values['spectacle_id'],))
+        edits += [
+            {'type': type, 'id': row['id'],
+             'date': spectacle_dates['date_from'].isoformat(),
+             'spectacle_id': values['spectacle_id']}
+            for row in cursor.fetchall()]
+    cursor.connection.close()
+
+    client = app.test_client()
+    with client.session_transaction() as client_session:
+        client_session['person_id'] = values['person_id']
+
+    benchmarks = {}
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        skipped = rule.endpoint in ('static', 'logout')
+        if skipped or 'GET' not in rule.methods:
+            continue
+        if not rule.arguments <= values.keys():
+            continue
+        with app.test_request_context():
+            url = url_for(rule.endpoint, **{
+                argument: values[argument] for argument in rule.arguments})
+        benchmarks[f'GET {rule.rule}'] = partial(
+            benchmark_route, client, 'GET', url)
+
+    start = date(values['year'], values['month'], 1)
+    stop = add_months(values['year'], values['month'], 1) - timedelta(1)
+    year_stop = add_months(values['year'], values['month'], 12)
+    benchmarks['get_spectacles month'] = partial(
+        benchmark_function, get_spectacles,
+        f'spectacle.id IN ({SPECTACLE_OVERLAP})',
+        {'start': start, 'stop': stop}, 'date_from, date_to, place')
+    for type in FOLLOWUP_TYPES:
+        benchmarks[f'get_followup_matrix {type} year'] = partial(
+            benchmark_function, get_followup_matrix, type, start,
+            year_stop - timedelta(1))
+    if spectacle_dates:
+        spectacle_id = values['spectacle_id']
+        benchmarks['get_spectacle_data'] = partial(
+            benchmark_function, get_spectacle_data, spectacle_id)
+        benchmarks['POST /followup/update batch'] = partial(
+            benchmark_write, snapshot, client, 'POST', '/followup/update',
+            json=edits)
+
+    if 'artist_id' in values:
+        url = f'/availabilities/{values["artist_id"]}/{start}/{stop}/update'
+        benchmarks['POST /availabilities range fill'] = partial(
+            benchmark_write, snapshot, client, 'POST', url,
+            data={'available': '1', 'representation_date_id': ''})
+
+    results = {}
+    for name, benchmark in benchmarks.items():
+        benchmark()
+        samples = [benchmark() for _ in range(repeat)]
+        durations = [duration for duration, _, _ in samples]
+        results[name] = {
+            'median': round(median(durations), 3),
+            'min': round(min(durations), 3),
+            'max': round(max(durations), 3),
+            'queries': samples[-1][1],
+            'db': round(median(db for _, _, db in samples), 3),
+        }
+    return results
+
+
+@cli.command('benchmark')
+@click.argument('database', type=click.Path(exists=True, dir_okay=False))
+@click.option('--repeat', type=int, default=5)
+@click.option('--output', type=click.File('w'))
+@click.option('--compare', type=click.File('r'))
+def benchmark_command(database, repeat, output, compare):
+    """Time routes and core queries on a copy of a database."""
+    with TemporaryDirectory() as folder:
+        app.config.update(
+            DB=copy_database(database, folder), MAIL_WORKER=False,
+            DB_SLOW_QUERY_THRESHOLD=None)
+        connection = get_pool().connect()
+        counts = {
+            table: connection.execute(
+                f'SELECT count(*) FROM {table}').fetchone()[0]
+            for table in (
+                'spectacle', 'representation_date',
+                'artist_representation_date', 'artist',
+                'artist_availability')}
+        connection.close()
+        snapshot = str(Path(folder) / 'snapshot.db')
+        backup_database(app.config['DB'], snapshot)
+        results = run_benchmarks(repeat, snapshot)
+        close_pools(app.config['DB'])
+
+    report = {
+        'version': app.config['GIT_VERSION'],
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'repeat': repeat,
+        'counts': counts,
+        'results': results,
+    }
+    previous = json.load(compare)['results'] if compare else {}
+    for name, result in results.items():
+        line = (
+            f'{name:60} {result["median"]:9.1f} ms '
+            f'{result["queries"]:5} queries')
+        if name in previous:
+            ratio = result['median'] / (previous[name]['median'] or 1)
+            line += f' {previous[name]["median"]:9.1f} ms {ratio:6.2f}×'
+        click.echo(line)
+    if output:
+        json.dump(report, output, indent=2)
+
+
+STARTUP_SCRIPT = '''
+import json, sys
+from time import perf_counter
+start = perf_counter()
+import paillette
+duration = (perf_counter() - start) * 1000
+with open('/proc/self/status') as status:
+    rss = next(line.split()[1] for line in status if line[:6] == 'VmRSS:')
+print(json.dumps({
+    'import': duration, 'rss': int(rss) / 1024, 'modules': list(sys.modules)}))
+'''
+HEAVY_MODULES = ('weasyprint', 'PIL', 'smtplib', 'email.mime')
+
+
+def parse_import_times(lines):
+    # Keep modules imported directly by paillette, with their dependencies
+    imports, times = {}, {}
+    for line in lines:
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            imports[name.strip()] = int(cumulative) / 1000
+        elif depth == 0:
+            if name.strip() == 'paillette':
+                times = imports
+            imports = {}
+    return times
+
+
+def measure_startup():
+    try:
+        process = run(
+            (sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT),
+            cwd=Path(app.root_path).parent, capture_output=True, text=True,
+            check=True)
+    except CalledProcessError as exception:
+        raise click.ClickException(
+            f'Application import failed:\n{exception.stderr[-2000:]}')
+    result = json.loads(process.stdout.splitlines()[-1])
+    result['imports'] = parse_import_times(process.stderr.splitlines())
+    modules = result.pop('modules')
+    result['heavy'] = [name for name in HEAVY_MODULES if name in modules]
+    return result
+
+
+@cli.command('benchmark-startup')
+@click.option('--repeat', type=int, default=5)
+@click.option('--output', type=click.File('w'))
+@click.option('--compare', type=click.File('r'))
+def benchmark_startup_command(repeat, output, compare):
+    """Time the application import and measure the memory of a worker."""
+    runs = [measure_startup() for _ in range(repeat)]
+    results = {
+        key: {
+            'median': median(result[key] for result in runs),
+            'min': min(result[key] for result in runs),
+            'max': max(result[key] for result in runs),
+        } for key in ('import', 'rss')}
+    imports = {
+        name: median(
+            result['imports'].get(name, 0) for result in runs)
+        for name in runs[-1]['imports']}
+    report = {
+        'version': app.config['GIT_VERSION'],
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': python_version(),
+        'repeat': repeat,
+        'results': results,
+        'imports': dict(sorted(
+            imports.items(), key=lambda item: item[1], reverse=True)),
+        'heavy': runs[-1]['heavy'],
+    }
+    previous = json.load(compare)['results'] if compare else {}
+    for key, unit in (('import', 'ms'), ('rss', 'MiB')):
+        line = f'{key:20} {results[key]["median"]:9.1f} {unit}'
+        if key in previous:
+            ratio = results[key]['median'] / (previous[key]['median'] or 1)
+            line += f' {previous[key]["median"]:9.1f} {unit} {ratio:6.2f}×'
+        click.echo(line)
+    for name, duration in list(report['imports'].items())[:10]:
+        click.echo(f'  {name:30} {duration:9.1f} ms')
+    click.echo(f'heavy modules loaded: {", ".join(report["heavy"]) or "none"}')
+    if output:
+        json.dump(report, output, indent=2)
+
+
+class SMTPSinkHandler(StreamRequestHandler):
+    def handle(self):
+        self.wfile.write(b'220 Paillette SMTP sink\r\n')
+        for line in self.rfile:
+            command = line[:4].upper()
+            if command == b'DATA':
+                self.wfile.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+                for line in self.rfile:
+                    if line == b'.\r\n':
+                        break
+                with self.server.lock:
+                    self.server.mails += 1
+                self.wfile.write(b'250 OK\r\n')
+            elif command == b'QUIT':
+                self.wfile.write(b'221 Bye\r\n')
+                return
+            else:
+                self.wfile.write(b'250 OK\r\n')
+
+
+class SMTPSink(ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPSinkHandler)
+        self.lock = Lock()
+        self.mails = 0
+
+
+FAKE_GHOSTSCRIPT = '''#!{executable}
+import sys
+from PIL import Image
+if '-dNODISPLAY' in sys.argv:
+    print(1)
+else:
+    output = [arg for arg in sys.argv if arg.startswith('-sOutputFile=')]
+    Image.new('RGB', (707, 1000), 'white').save(output[0].split('=', 1)[1])
+'''
+
+
+def make_blank_pdf():
+    objects = (
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] >>')
+    pdf, offsets = b'%PDF-1.4\n', []
+    for i, content in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b'%d 0 obj\n%s\nendobj\n' % (i, content)
+    xref = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    pdf += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\n' % (len(objects) + 1)
+    pdf += b'startxref\n%d\n%%%%EOF\n' % xref
+    return pdf
+
+
+class FormParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.forms = []
+        self.textarea = None
+
+    def handle_starttag(self, tag, attributes):
+        attributes = dict(attributes)
+        if tag == 'form':
+            self.forms.append((attributes.get('action'), []))
+        elif not self.forms or 'name' not in attributes:
+            return
+        elif tag == 'textarea':
+            self.textarea = [attributes['name'], '']
+            self.forms[-1][1].append(self.textarea)
+        elif tag == 'input':
+            checkable = attributes.get('type') in ('checkbox', 'radio')
+            if not checkable or 'checked' in attributes:
+                self.forms[-1][1].append(
+                    [attributes['name'], attributes.get('value') or ''])
+
+    def handle_data(self, data):
+        if self.textarea:
+            self.textarea[1] += data
+
+    def handle_endtag(self, tag):
+        if tag == 'textarea':
+            self.textarea = None
+
+    def get_fields(self, action=None):
+        for form_action, fields in self.forms:
+            if form_action == action:
+                return [tuple(field) for field in fields]
+        return []
+
+
+class NoRedirectHandler(HTTPRedirectHandler):
+    def redirect_request(self, *args):
+        return None
+
+
+class VirtualUser:
+    def __init__(self, base_url, data, seed):
+        self.base_url = base_url
+        self.data = data
+        self.random = Random(seed)
+        self.opener = build_opener(
+            HTTPCookieProcessor(CookieJar()), NoRedirectHandler())
+        self.samples = {}
+
+    def request(self, name, url, data=None, headers={}):
+        if isinstance(data, (list, dict)):
+            data = urlencode(data).encode()
+        request = Request(f'{self.base_url}{url}', data, headers)
+        start = perf_counter()
+        try:
+            with self.opener.open(request) as response:
+                body, status = response.read(), response.status
+        except HTTPError as error:
+            body, status = error.read(), error.code
+        except OSError:
+            body, status = b'', 0
+        duration = (perf_counter() - start) * 1000
+        self.samples.setdefault(name, []).append((duration, status))
+        return body.decode(errors='replace')
+
+    def login(self, mail, password):
+        self.request(
+            'POST /login', '/login', {'login': mail, 'password': password})
+
+    def random_day(self):
+        days = (self.data['stop'] - self.data['start']).days
+        return self.data['start'] + timedelta(self.random.randrange(days))
+
+    def browse_spectacles(self):
+        day = self.random_day()
+        self.request(
+            'GET /spectacles/<int:year>/<int:month>',
+            f'/spectacles/{day.year}/{day.month}')
+
+    def edit_artists_followup(self):
+        day = self.random_day()
+        self.request(
+            'GET /artists/followup/<int:year>/<int:month>',
+            f'/artists/followup/{day.year}/{day.month}')
+        for _ in range(self.random.randrange(1, 6)):
+            artist_id = self.random.choice(self.data['artists'])
+            day = day.replace(day=self.random.randrange(1, 29))
+            available = self.random.choice(('', '0', '1'))
+            self.request(
+                'POST /availabilities/<int:artist_id>/<date>/update',
+                f'/availabilities/{artist_id}/{day}/update',
+                {'available': available, 'representation_date_id': ''})
+
+    def save_spectacle(self):
+        spectacle_id = self.random.choice(self.data['spectacles'])
+        url = f'/spectacle/{spectacle_id}/update'
+        parser = FormParser()
+        parser.feed(
+            self.request('GET /spectacle/<int:spectacle_id>/update', url))
+        fields = parser.get_fields()
+        if self.random.random() < 0.5:
+            fields = [field for field in fields if field[0] != 'pocket']
+        else:
+            fields.append(('pocket', 'on'))
+        self.request('POST /spectacle/<int:spectacle_id>/update', url, fields)
+
+    def send_roadmap(self):
+        spectacle_id = self.random.choice(self.data['spectacles'])
+        url = f'/roadmap/{spectacle_id}/send'
+        parser = FormParser()
+        parser.feed(self.request('GET /roadmap/<int:spectacle_id>/send', url))
+        self.request(
+            'POST /roadmap/<int:spectacle_id>/send', url,
+            parser.get_fields())
+
+        boundary = uuid4().hex
+        body = (
+            f'--{boundary}\r\nContent-Disposition: form-data; '
+            f'name="images"; filename="{boundary}.pdf"\r\n'
+            'Content-Type: application/pdf\r\n\r\n').encode()
+        body += make_blank_pdf() + f'\r\n--{boundary}--\r\n'.encode()
+        self.request(
+            'POST /roadmap/<int:spectacle_id>/attach',
+            f'/roadmap/{spectacle_id}/attach', body,
+            {'Content-Type': f'multipart/form-data; boundary={boundary}'})
+        html = self.request('GET /roadmap/<int:spectacle_id>/send', url)
+        # Only detach the images attached by this user
+        for action in re.findall(
+                f'<img src="[^"]*{boundary}[^"]*">\\s*'
+                '<form method="post" action="([^"]+)">', html):
+            self.request('POST /roadmap/image/<image_id>/detach', action, b'')
+
+    def run(self, deadline, think):
+        flows = (
+            self.browse_spectacles, self.edit_artists_followup,
+            self.save_spectacle, self.send_roadmap)
+        while perf_counter() < deadline:
+            self.random.choices(flows, (50, 25, 15, 10))[0]()
+            Event().wait(self.random.uniform(0, 2 * think))
+
+
+def get_load_test_data(cursor):
+    cursor.execute('SELECT min(date_from), max(date_to) FROM spectacle')
+    start, stop = cursor.fetchone()
+    cursor.execute('SELECT id FROM spectacle')
+    spectacles = [row[0] for row in cursor.fetchall()]
+    cursor.execute('SELECT id FROM artist WHERE NOT hidden')
+    artists = [row[0] for row in cursor.fetchall()]
+    if not spectacles or not artists:
+        raise click.ClickException('Database has no spectacles or artists')
+    return {
+        'start': date.fromisoformat(start), 'stop': date.fromisoformat(stop),
+        'spectacles': spectacles, 'artists': artists}
+
+
+@cli.command('load-test')
+@click.argument('database', type=click.Path(exists=True, dir_okay=False))
+@click.option('--users', type=int, default=20)
+@click.option('--duration', type=float, default=60)
+@click.option('--think', type=float, default=1)
+@click.option('--fake-ghostscript', is_flag=True)
+@click.option('--output', type=click.File('w'))
+def load_test_command(database, users, duration, think, fake_ghostscript,
+                      output):
+    """Simulate concurrent planners on a copy of a database."""
+    with TemporaryDirectory() as folder:
+        path = copy_database(database, folder)
+        password = uuid4().hex
+        connection = sqlite3.connect(path)
+        cursor = connection.execute('''
+          UPDATE person
+          SET password = ?
+          WHERE id NOT IN (SELECT person_id FROM artist)
+          AND mail IS NOT NULL
+          RETURNING mail
+        ''', (generate_password_hash(password),))
+        logins = [row[0] for row in cursor.fetchall()]
+        data = get_load_test_data(cursor)
+        connection.commit()
+        connection.close()
+        if not logins:
+            raise click.ClickException(
+                'Database has no staff member to log in')
+
+        sink = SMTPSink()
+        Thread(target=sink.serve_forever, daemon=True).start()
+        app.config.update(
+            DB=path, DEBUG=False, MAIL_WORKER=True,
+            DB_SLOW_QUERY_THRESHOLD=None, SMTP_HOSTNAME='127.0.0.1',
+            SMTP_PORT=sink.server_address[1], SMTP_SSL=False, SMTP_LOGIN=None,
+            MAIL_QUEUE_INTERVAL=1)
+        app.instance_path = str(Path(folder) / 'instance')
+        if fake_ghostscript:
+            ghostscript = Path(folder) / 'bin' / 'gs'
+            ghostscript.parent.mkdir()
+            ghostscript.write_text(
+                FAKE_GHOSTSCRIPT.format(executable=sys.executable))
+            ghostscript.chmod(0o755)
+            os.environ['PATH'] = os.pathsep.join(
+                (str(ghostscript.parent), os.environ['PATH']))
+
+        locked, locked_lock = {}, Lock()
+
+        def count_locked(sender, exception, **extra):
+            if isinstance(exception, sqlite3.OperationalError):
+                if 'locked' in str(exception):
+                    name = f'{request.method} {request.url_rule.rule}'
+                    with locked_lock:
+                        locked[name] = locked.get(name, 0) + 1
+        got_request_exception.connect(count_locked, app)
+
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+        virtual_users = []
+        for i in range(users):
+            virtual_user = VirtualUser(base_url, data, seed=i)
+            virtual_user.login(logins[i % len(logins)], password)
+            virtual_users.append(virtual_user)
+
+        start = perf_counter()
+        threads = [
+            Thread(target=virtual_user.run, args=(start + duration, think))
+            for virtual_user in virtual_users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - start
+        server.shutdown()
+
+        # Give the mail worker some time to empty the queue
+        cursor = get_pool().connect().cursor()
+        for _ in range(30):
+            cursor.execute(
+                "SELECT count(*) FROM mail WHERE status = 'pending'")
+            if not cursor.fetchone()[0]:
+                break
+            mail_event.set()
+            Event().wait(1)
+        cursor.execute('SELECT status, count(*) FROM mail GROUP BY status')
+        mails = dict(cursor.fetchall())
+        cursor.connection.close()
+        sink.shutdown()
+        close_pools(path)
+
+    samples = {}
+    for virtual_user in virtual_users:
+        for name, user_samples in virtual_user.samples.items():
+            samples.setdefault(name, []).extend(user_samples)
+    results = {}
+    for name, name_samples in sorted(samples.items()):
+        durations = sorted(duration for duration, _ in name_samples)
+        if len(durations) > 1:
+            percentiles = quantiles(durations, n=100, method='inclusive')
+        else:
+            percentiles = durations * 99
+        results[name] = {
+            'requests': len(durations),
+            'throughput': round(len(durations) / elapsed, 3),
+            'p50': round(percentiles[49], 3),
+            'p95': round(percentiles[94], 3),
+            'p99': round(percentiles[98], 3),
+            'errors': sum(
+                1 for _, status in name_samples
+                if not status or status >= 400),
+            'locked': locked.get(name, 0),
+        }
+        click.echo(
+            f'{name:50} {results[name]["requests"]:6} requests '
+            f'{results[name]["throughput"]:7.2f}/s '
+            f'p50 {results[name]["p50"]:8.1f} ms '
+            f'p95 {results[name]["p95"]:8.1f} ms '
+            f'p99 {results[name]["p99"]:8.1f} ms '
+            f'{results[name]["errors"]:4} errors '
+            f'{results[name]["locked"]:4} locked')
+    requests = sum(result['requests'] for result in results.values())
+    click.echo(
+        f'{requests} requests in {elapsed:.1f} s ({requests / elapsed:.2f}/s)'
+        f', {sink.mails} mails received by the SMTP sink')
+    if output:
+        json.dump({
+            'version': app.config['GIT_VERSION'],
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'users': users,
+            'duration': elapsed,
+            'think': think,
+            'fake_ghostscript': fake_ghostscript,
+            'mails': {'received': sink.mails, **mails},
+            'results': results,
+        }, output, indent=2)
@@ -0,0 +1,61 @@
+CREATE INDEX IF NOT EXISTS person_mail ON person (mail);
+CREATE INDEX IF NOT EXISTS person_reset_password ON person (reset_password);
+
+CREATE INDEX IF NOT EXISTS spectacle_date_from ON spectacle (date_from);
+CREATE INDEX IF NOT EXISTS spectacle_date_to ON spectacle (date_to);
+
+CREATE INDEX IF NOT EXISTS spectacle_image_spectacle_id
+ON spectacle_image (spectacle_id);
+
+CREATE INDEX IF NOT EXISTS artist_person_id ON artist (person_id);
+
+CREATE INDEX IF NOT EXISTS contract_artist_id ON contract (artist_id);
+CREATE INDEX IF NOT EXISTS contract_spectacle_id ON contract (spectacle_id);
+
+CREATE INDEX IF NOT EXISTS artist_availability_artist_id_date
+ON artist_availability (artist_id, date);
+CREATE INDEX IF NOT EXISTS artist_availability_date
+ON artist_availability (date);
+
+CREATE INDEX IF NOT EXISTS representation_spectacle_id
+ON representation (spectacle_id);
+
+CREATE INDEX IF NOT EXISTS representation_date_representation_id
+ON representation_date (representation_id);
+CREATE INDEX IF NOT EXISTS representation_date_date
+ON representation_date (date, representation_id);
+
+CREATE INDEX IF NOT EXISTS artist_representation_date_artist_id
+ON artist_representation_date (artist_id, representation_date_id);
+CREATE INDEX IF NOT EXISTS artist_representation_date_representation_date_id
+ON artist_representation_date (representation_date_id);
+
+CREATE INDEX IF NOT EXISTS costume_spectacle_costume_id
+ON costume_spectacle (costume_id);
+CREATE INDEX IF NOT EXISTS costume_spectacle_spectacle_id
+ON costume_spectacle (spectacle_id);
+
+CREATE INDEX IF NOT EXISTS makeup_spectacle_makeup_id
+ON makeup_spectacle (makeup_id);
+CREATE INDEX IF NOT EXISTS makeup_spectacle_spectacle_id
+ON makeup_spectacle (spectacle_id);
+
+CREATE INDEX IF NOT EXISTS sound_spectacle_sound_id
+ON sound_spectacle (sound_id);
+CREATE INDEX IF NOT EXISTS sound_spectacle_spectacle_id
+ON sound_spectacle (spectacle_id);
+
+CREATE INDEX IF NOT EXISTS vehicle_spectacle_vehicle_id
+ON vehicle_spectacle (vehicle_id);
+CREATE INDEX IF NOT EXISTS vehicle_spectacle_spectacle_id
+ON vehicle_spectacle (spectacle_id);
+
+CREATE INDEX IF NOT EXISTS card_spectacle_card_id
+ON card_spectacle (card_id);
+CREATE INDEX IF NOT EXISTS card_spectacle_spectacle_id
+ON card_spectacle (spectacle_id);
+
+CREATE INDEX IF NOT EXISTS beeper_spectacle_beeper_id
+ON beeper_spectacle (beeper_id);
+CREATE INDEX IF NOT EXISTS beeper_spectacle_spectacle_id
+ON beeper_spectacle (spectacle_id);
@@ -0,0 +1,15 @@
+CREATE TABLE mail (
+  id INTEGER PRIMARY KEY,
+  sender TEXT NOT NULL,
+  recipients TEXT NOT NULL,
+  subject TEXT,
+  message BLOB NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending',
+  attempts INTEGER NOT NULL DEFAULT 0,
+  error TEXT,
+  created TIMESTAMP NOT NULL,
+  next_attempt TIMESTAMP NOT NULL,
+  sent TIMESTAMP
+);
+
+CREATE INDEX mail_status_next_attempt ON mail (status, next_attempt);
@@ -0,0 +1,397 @@
+CREATE TABLE spectacle_summary (
+  spectacle_id INTEGER PRIMARY KEY REFERENCES spectacle(id),
+  first_date DATE,
+  last_date DATE,
+  contract_artist_ids TEXT,
+  vehicles TEXT,
+  makeups TEXT,
+  sounds TEXT,
+  beepers TEXT,
+  cards TEXT,
+  artists TEXT,
+  representations TEXT
+);
+
+CREATE VIEW spectacle_summary_view AS
+SELECT
+  spectacle.id AS spectacle_id,
+  (
+    SELECT MIN(date)
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    WHERE representation.spectacle_id = spectacle.id
+  ) AS first_date,
+  (
+    SELECT MAX(date)
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    WHERE representation.spectacle_id = spectacle.id
+  ) AS last_date,
+  (
+    SELECT GROUP_CONCAT(DISTINCT contract.artist_id)
+    FROM contract
+    WHERE contract.spectacle_id = spectacle.id
+  ) AS contract_artist_ids,
+  (
+    SELECT GROUP_CONCAT(DISTINCT replace(vehicle.name, ',', ' '))
+    FROM vehicle_spectacle
+    JOIN vehicle
+    ON vehicle_spectacle.vehicle_id = vehicle.id
+    WHERE vehicle_spectacle.spectacle_id = spectacle.id
+  ) AS vehicles,
+  (
+    SELECT GROUP_CONCAT(DISTINCT replace(makeup.name, ',', ' '))
+    FROM makeup_spectacle
+    JOIN makeup
+    ON makeup_spectacle.makeup_id = makeup.id
+    WHERE makeup_spectacle.spectacle_id = spectacle.id
+  ) AS makeups,
+  (
+    SELECT GROUP_CONCAT(DISTINCT replace(sound.name, ',', ' '))
+    FROM sound_spectacle
+    JOIN sound
+    ON sound_spectacle.sound_id = sound.id
+    WHERE sound_spectacle.spectacle_id = spectacle.id
+  ) AS sounds,
+  (
+    SELECT GROUP_CONCAT(DISTINCT replace(beeper.name, ',', ' '))
+    FROM beeper_spectacle
+    JOIN beeper
+    ON beeper_spectacle.beeper_id = beeper.id
+    WHERE beeper_spectacle.spectacle_id = spectacle.id
+  ) AS beepers,
+  (
+    SELECT GROUP_CONCAT(DISTINCT replace(card.name, ',', ' '))
+    FROM card_spectacle
+    JOIN card
+    ON card_spectacle.card_id = card.id
+    WHERE card_spectacle.spectacle_id = spectacle.id
+  ) AS cards,
+  (
+    SELECT GROUP_CONCAT(DISTINCT replace(person.name, ',', ' '))
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    JOIN artist_representation_date
+    ON representation_date.id = artist_representation_date.representation_date_id
+    JOIN artist
+    ON artist.id = artist_representation_date.artist_id
+    JOIN person
+    ON person.id = artist.person_id
+    WHERE representation.spectacle_id = spectacle.id
+  ) AS artists,
+  (
+    SELECT GROUP_CONCAT(DISTINCT replace(representation.name, ',', ' '))
+    FROM representation
+    WHERE representation.spectacle_id = spectacle.id
+  ) AS representations
+FROM spectacle;
+
+INSERT INTO spectacle_summary
+SELECT * FROM spectacle_summary_view;
+
+CREATE TRIGGER spectacle_insert_summary AFTER INSERT ON spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.id;
+END;
+
+CREATE TRIGGER spectacle_delete_summary AFTER DELETE ON spectacle
+BEGIN
+  DELETE FROM spectacle_summary WHERE spectacle_id = OLD.id;
+END;
+
+CREATE TRIGGER contract_insert_summary AFTER INSERT ON contract
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER contract_update_summary AFTER UPDATE ON contract
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER contract_delete_summary AFTER DELETE ON contract
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TRIGGER representation_insert_summary AFTER INSERT ON representation
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER representation_update_summary AFTER UPDATE ON representation
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER representation_delete_summary AFTER DELETE ON representation
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TRIGGER vehicle_spectacle_insert_summary AFTER INSERT ON vehicle_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER vehicle_spectacle_update_summary AFTER UPDATE ON vehicle_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER vehicle_spectacle_delete_summary AFTER DELETE ON vehicle_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TRIGGER makeup_spectacle_insert_summary AFTER INSERT ON makeup_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER makeup_spectacle_update_summary AFTER UPDATE ON makeup_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER makeup_spectacle_delete_summary AFTER DELETE ON makeup_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TRIGGER sound_spectacle_insert_summary AFTER INSERT ON sound_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER sound_spectacle_update_summary AFTER UPDATE ON sound_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER sound_spectacle_delete_summary AFTER DELETE ON sound_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TRIGGER beeper_spectacle_insert_summary AFTER INSERT ON beeper_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER beeper_spectacle_update_summary AFTER UPDATE ON beeper_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER beeper_spectacle_delete_summary AFTER DELETE ON beeper_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TRIGGER card_spectacle_insert_summary AFTER INSERT ON card_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER card_spectacle_update_summary AFTER UPDATE ON card_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER card_spectacle_delete_summary AFTER DELETE ON card_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TRIGGER representation_date_insert_summary AFTER INSERT ON representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM representation
+    WHERE id = NEW.representation_id
+  );
+END;
+
+CREATE TRIGGER representation_date_update_summary AFTER UPDATE ON representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM representation
+    WHERE id IN (OLD.representation_id, NEW.representation_id)
+  );
+END;
+
+CREATE TRIGGER representation_date_delete_summary AFTER DELETE ON representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM representation
+    WHERE id = OLD.representation_id
+  );
+END;
+
+CREATE TRIGGER artist_representation_date_insert_summary AFTER INSERT ON artist_representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT representation.spectacle_id
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    WHERE representation_date.id = NEW.representation_date_id
+  );
+END;
+
+CREATE TRIGGER artist_representation_date_update_summary AFTER UPDATE ON artist_representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT representation.spectacle_id
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    WHERE representation_date.id IN (
+      OLD.representation_date_id, NEW.representation_date_id)
+  );
+END;
+
+CREATE TRIGGER artist_representation_date_delete_summary AFTER DELETE ON artist_representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT representation.spectacle_id
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    WHERE representation_date.id = OLD.representation_date_id
+  );
+END;
+
+CREATE TRIGGER vehicle_update_summary AFTER UPDATE OF name ON vehicle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM vehicle_spectacle
+    WHERE vehicle_id = NEW.id
+  );
+END;
+
+CREATE TRIGGER makeup_update_summary AFTER UPDATE OF name ON makeup
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM makeup_spectacle
+    WHERE makeup_id = NEW.id
+  );
+END;
+
+CREATE TRIGGER sound_update_summary AFTER UPDATE OF name ON sound
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM sound_spectacle
+    WHERE sound_id = NEW.id
+  );
+END;
+
+CREATE TRIGGER beeper_update_summary AFTER UPDATE OF name ON beeper
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM beeper_spectacle
+    WHERE beeper_id = NEW.id
+  );
+END;
+
+CREATE TRIGGER card_update_summary AFTER UPDATE OF name ON card
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM card_spectacle
+    WHERE card_id = NEW.id
+  );
+END;
+
+CREATE TRIGGER person_update_summary AFTER UPDATE OF firstname, lastname ON person
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT representation.spectacle_id
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    JOIN artist_representation_date
+    ON representation_date.id = artist_representation_date.representation_date_id
+    JOIN artist
+    ON artist.id = artist_representation_date.artist_id
+    WHERE artist.person_id = NEW.id
+  );
+END;
@@ -0,0 +1,31 @@
+CREATE VIRTUAL TABLE spectacle_interval USING rtree_i32(id, day_from, day_to);
+
+INSERT INTO spectacle_interval
+SELECT
+  id,
+  CAST(julianday(min(date_from, date_to)) AS INTEGER),
+  CAST(julianday(max(date_from, date_to)) AS INTEGER)
+FROM spectacle;
+
+CREATE TRIGGER spectacle_insert_interval AFTER INSERT ON spectacle
+BEGIN
+  INSERT INTO spectacle_interval VALUES (
+    NEW.id,
+    CAST(julianday(min(NEW.date_from, NEW.date_to)) AS INTEGER),
+    CAST(julianday(max(NEW.date_from, NEW.date_to)) AS INTEGER)
+  );
+END;
+
+CREATE TRIGGER spectacle_update_interval AFTER UPDATE OF date_from, date_to ON spectacle
+BEGIN
+  UPDATE spectacle_interval
+  SET
+    day_from = CAST(julianday(min(NEW.date_from, NEW.date_to)) AS INTEGER),
+    day_to = CAST(julianday(max(NEW.date_from, NEW.date_to)) AS INTEGER)
+  WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER spectacle_delete_interval AFTER DELETE ON spectacle
+BEGIN
+  DELETE FROM spectacle_interval WHERE id = OLD.id;
+END;
@@ -0,0 +1,436 @@
+-- Tables are rebuilt to add ON DELETE CASCADE, as SQLite cannot alter
+-- foreign keys. Indexes and triggers of rebuilt tables are recreated.
+PRAGMA legacy_alter_table=ON;
+
+CREATE TABLE spectacle_image_new (
+  id INTEGER PRIMARY KEY,
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE,
+  filename TEXT
+);
+
+INSERT INTO spectacle_image_new
+SELECT id, spectacle_id, filename
+FROM spectacle_image
+WHERE spectacle_id IN (SELECT id FROM spectacle);
+
+DROP TABLE spectacle_image;
+ALTER TABLE spectacle_image_new RENAME TO spectacle_image;
+
+CREATE INDEX spectacle_image_spectacle_id
+ON spectacle_image (spectacle_id);
+
+CREATE TABLE contract_new (
+  id INTEGER PRIMARY KEY,
+  artist_id INTEGER NOT NULL REFERENCES artist(id) ON DELETE CASCADE,
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE
+);
+
+INSERT INTO contract_new
+SELECT id, artist_id, spectacle_id
+FROM contract
+WHERE artist_id IN (SELECT id FROM artist)
+AND spectacle_id IN (SELECT id FROM spectacle);
+
+DROP TABLE contract;
+ALTER TABLE contract_new RENAME TO contract;
+
+CREATE INDEX contract_artist_id ON contract (artist_id);
+CREATE INDEX contract_spectacle_id ON contract (spectacle_id);
+
+CREATE TRIGGER contract_insert_summary AFTER INSERT ON contract
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER contract_update_summary AFTER UPDATE ON contract
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER contract_delete_summary AFTER DELETE ON contract
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TABLE representation_new (
+  id INTEGER PRIMARY KEY,
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE,
+  name TEXT NOT NULL
+);
+
+INSERT INTO representation_new
+SELECT id, spectacle_id, name
+FROM representation
+WHERE spectacle_id IN (SELECT id FROM spectacle);
+
+DROP TABLE representation;
+ALTER TABLE representation_new RENAME TO representation;
+
+CREATE INDEX representation_spectacle_id
+ON representation (spectacle_id);
+
+CREATE TRIGGER representation_insert_summary AFTER INSERT ON representation
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER representation_update_summary AFTER UPDATE ON representation
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER representation_delete_summary AFTER DELETE ON representation
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TABLE representation_date_new (
+  id INTEGER PRIMARY KEY,
+  representation_id INTEGER NOT NULL REFERENCES representation(id) ON DELETE CASCADE,
+  date DATE NOT NULL
+);
+
+INSERT INTO representation_date_new
+SELECT id, representation_id, date
+FROM representation_date
+WHERE representation_id IN (SELECT id FROM representation);
+
+DROP TABLE representation_date;
+ALTER TABLE representation_date_new RENAME TO representation_date;
+
+CREATE INDEX representation_date_representation_id
+ON representation_date (representation_id);
+CREATE INDEX representation_date_date
+ON representation_date (date, representation_id);
+
+CREATE TRIGGER representation_date_insert_summary AFTER INSERT ON representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM representation
+    WHERE id = NEW.representation_id
+  );
+END;
+
+CREATE TRIGGER representation_date_update_summary AFTER UPDATE ON representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM representation
+    WHERE id IN (OLD.representation_id, NEW.representation_id)
+  );
+END;
+
+CREATE TRIGGER representation_date_delete_summary AFTER DELETE ON representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM representation
+    WHERE id = OLD.representation_id
+  );
+END;
+
+CREATE TABLE artist_representation_date_new (
+  id INTEGER PRIMARY KEY,
+  artist_id INTEGER NOT NULL REFERENCES artist(id) ON DELETE CASCADE,
+  representation_date_id INTEGER NOT NULL REFERENCES representation_date(id) ON DELETE CASCADE
+);
+
+INSERT INTO artist_representation_date_new
+SELECT id, artist_id, representation_date_id
+FROM artist_representation_date
+WHERE artist_id IN (SELECT id FROM artist)
+AND representation_date_id IN (SELECT id FROM representation_date);
+
+DROP TABLE artist_representation_date;
+ALTER TABLE artist_representation_date_new RENAME TO artist_representation_date;
+
+CREATE INDEX artist_representation_date_artist_id
+ON artist_representation_date (artist_id, representation_date_id);
+CREATE INDEX artist_representation_date_representation_date_id
+ON artist_representation_date (representation_date_id);
+
+CREATE TRIGGER artist_representation_date_insert_summary AFTER INSERT ON artist_representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT representation.spectacle_id
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    WHERE representation_date.id = NEW.representation_date_id
+  );
+END;
+
+CREATE TRIGGER artist_representation_date_update_summary AFTER UPDATE ON artist_representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT representation.spectacle_id
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    WHERE representation_date.id IN (
+      OLD.representation_date_id, NEW.representation_date_id)
+  );
+END;
+
+CREATE TRIGGER artist_representation_date_delete_summary AFTER DELETE ON artist_representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT representation.spectacle_id
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    WHERE representation_date.id = OLD.representation_date_id
+  );
+END;
+
+CREATE TABLE costume_spectacle_new (
+  id INTEGER PRIMARY KEY,
+  costume_id INTEGER NOT NULL REFERENCES costume(id) ON DELETE CASCADE,
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE
+);
+
+INSERT INTO costume_spectacle_new
+SELECT id, costume_id, spectacle_id
+FROM costume_spectacle
+WHERE costume_id IN (SELECT id FROM costume)
+AND spectacle_id IN (SELECT id FROM spectacle);
+
+DROP TABLE costume_spectacle;
+ALTER TABLE costume_spectacle_new RENAME TO costume_spectacle;
+
+CREATE INDEX costume_spectacle_costume_id
+ON costume_spectacle (costume_id);
+CREATE INDEX costume_spectacle_spectacle_id
+ON costume_spectacle (spectacle_id);
+
+CREATE TABLE makeup_spectacle_new (
+  id INTEGER PRIMARY KEY,
+  makeup_id INTEGER NOT NULL REFERENCES makeup(id) ON DELETE CASCADE,
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE
+);
+
+INSERT INTO makeup_spectacle_new
+SELECT id, makeup_id, spectacle_id
+FROM makeup_spectacle
+WHERE makeup_id IN (SELECT id FROM makeup)
+AND spectacle_id IN (SELECT id FROM spectacle);
+
+DROP TABLE makeup_spectacle;
+ALTER TABLE makeup_spectacle_new RENAME TO makeup_spectacle;
+
+CREATE INDEX makeup_spectacle_makeup_id
+ON makeup_spectacle (makeup_id);
+CREATE INDEX makeup_spectacle_spectacle_id
+ON makeup_spectacle (spectacle_id);
+
+CREATE TRIGGER makeup_spectacle_insert_summary AFTER INSERT ON makeup_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER makeup_spectacle_update_summary AFTER UPDATE ON makeup_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER makeup_spectacle_delete_summary AFTER DELETE ON makeup_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TABLE sound_spectacle_new (
+  id INTEGER PRIMARY KEY,
+  sound_id INTEGER NOT NULL REFERENCES sound(id) ON DELETE CASCADE,
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE
+);
+
+INSERT INTO sound_spectacle_new
+SELECT id, sound_id, spectacle_id
+FROM sound_spectacle
+WHERE sound_id IN (SELECT id FROM sound)
+AND spectacle_id IN (SELECT id FROM spectacle);
+
+DROP TABLE sound_spectacle;
+ALTER TABLE sound_spectacle_new RENAME TO sound_spectacle;
+
+CREATE INDEX sound_spectacle_sound_id
+ON sound_spectacle (sound_id);
+CREATE INDEX sound_spectacle_spectacle_id
+ON sound_spectacle (spectacle_id);
+
+CREATE TRIGGER sound_spectacle_insert_summary AFTER INSERT ON sound_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER sound_spectacle_update_summary AFTER UPDATE ON sound_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER sound_spectacle_delete_summary AFTER DELETE ON sound_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TABLE vehicle_spectacle_new (
+  id INTEGER PRIMARY KEY,
+  vehicle_id INTEGER NOT NULL REFERENCES vehicle(id) ON DELETE CASCADE,
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE
+);
+
+INSERT INTO vehicle_spectacle_new
+SELECT id, vehicle_id, spectacle_id
+FROM vehicle_spectacle
+WHERE vehicle_id IN (SELECT id FROM vehicle)
+AND spectacle_id IN (SELECT id FROM spectacle);
+
+DROP TABLE vehicle_spectacle;
+ALTER TABLE vehicle_spectacle_new RENAME TO vehicle_spectacle;
+
+CREATE INDEX vehicle_spectacle_vehicle_id
+ON vehicle_spectacle (vehicle_id);
+CREATE INDEX vehicle_spectacle_spectacle_id
+ON vehicle_spectacle (spectacle_id);
+
+CREATE TRIGGER vehicle_spectacle_insert_summary AFTER INSERT ON vehicle_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER vehicle_spectacle_update_summary AFTER UPDATE ON vehicle_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER vehicle_spectacle_delete_summary AFTER DELETE ON vehicle_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TABLE card_spectacle_new (
+  id INTEGER PRIMARY KEY,
+  card_id INTEGER NOT NULL REFERENCES card(id) ON DELETE CASCADE,
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE
+);
+
+INSERT INTO card_spectacle_new
+SELECT id, card_id, spectacle_id
+FROM card_spectacle
+WHERE card_id IN (SELECT id FROM card)
+AND spectacle_id IN (SELECT id FROM spectacle);
+
+DROP TABLE card_spectacle;
+ALTER TABLE card_spectacle_new RENAME TO card_spectacle;
+
+CREATE INDEX card_spectacle_card_id
+ON card_spectacle (card_id);
+CREATE INDEX card_spectacle_spectacle_id
+ON card_spectacle (spectacle_id);
+
+CREATE TRIGGER card_spectacle_insert_summary AFTER INSERT ON card_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER card_spectacle_update_summary AFTER UPDATE ON card_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER card_spectacle_delete_summary AFTER DELETE ON card_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TABLE beeper_spectacle_new (
+  id INTEGER PRIMARY KEY,
+  beeper_id INTEGER NOT NULL REFERENCES beeper(id) ON DELETE CASCADE,
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE
+);
+
+INSERT INTO beeper_spectacle_new
+SELECT id, beeper_id, spectacle_id
+FROM beeper_spectacle
+WHERE beeper_id IN (SELECT id FROM beeper)
+AND spectacle_id IN (SELECT id FROM spectacle);
+
+DROP TABLE beeper_spectacle;
+ALTER TABLE beeper_spectacle_new RENAME TO beeper_spectacle;
+
+CREATE INDEX beeper_spectacle_beeper_id
+ON beeper_spectacle (beeper_id);
+CREATE INDEX beeper_spectacle_spectacle_id
+ON beeper_spectacle (spectacle_id);
+
+CREATE TRIGGER beeper_spectacle_insert_summary AFTER INSERT ON beeper_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER beeper_spectacle_update_summary AFTER UPDATE ON beeper_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER beeper_spectacle_delete_summary AFTER DELETE ON beeper_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+PRAGMA legacy_alter_table=OFF;
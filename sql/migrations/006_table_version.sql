@@ -0,0 +1,326 @@
+CREATE TABLE table_version (
+  name TEXT PRIMARY KEY,
+  version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT INTO table_version (name) VALUES
+('person'),
+('spectacle'),
+('spectacle_summary'),
+('artist'),
+('artist_availability'),
+('representation'),
+('representation_date'),
+('artist_representation_date'),
+('costume'),
+('costume_spectacle'),
+('makeup'),
+('makeup_spectacle'),
+('sound'),
+('sound_spectacle'),
+('vehicle'),
+('vehicle_spectacle'),
+('card'),
+('card_spectacle'),
+('beeper'),
+('beeper_spectacle');
+
+CREATE TRIGGER person_insert_version AFTER INSERT ON person
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'person';
+END;
+
+CREATE TRIGGER person_update_version AFTER UPDATE ON person
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'person';
+END;
+
+CREATE TRIGGER person_delete_version AFTER DELETE ON person
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'person';
+END;
+
+CREATE TRIGGER spectacle_insert_version AFTER INSERT ON spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'spectacle';
+END;
+
+CREATE TRIGGER spectacle_update_version AFTER UPDATE ON spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'spectacle';
+END;
+
+CREATE TRIGGER spectacle_delete_version AFTER DELETE ON spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'spectacle';
+END;
+
+CREATE TRIGGER spectacle_summary_insert_version AFTER INSERT ON spectacle_summary
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'spectacle_summary';
+END;
+
+CREATE TRIGGER spectacle_summary_update_version AFTER UPDATE ON spectacle_summary
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'spectacle_summary';
+END;
+
+CREATE TRIGGER spectacle_summary_delete_version AFTER DELETE ON spectacle_summary
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'spectacle_summary';
+END;
+
+CREATE TRIGGER artist_insert_version AFTER INSERT ON artist
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist';
+END;
+
+CREATE TRIGGER artist_update_version AFTER UPDATE ON artist
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist';
+END;
+
+CREATE TRIGGER artist_delete_version AFTER DELETE ON artist
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist';
+END;
+
+CREATE TRIGGER artist_availability_insert_version AFTER INSERT ON artist_availability
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist_availability';
+END;
+
+CREATE TRIGGER artist_availability_update_version AFTER UPDATE ON artist_availability
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist_availability';
+END;
+
+CREATE TRIGGER artist_availability_delete_version AFTER DELETE ON artist_availability
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist_availability';
+END;
+
+CREATE TRIGGER representation_insert_version AFTER INSERT ON representation
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'representation';
+END;
+
+CREATE TRIGGER representation_update_version AFTER UPDATE ON representation
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'representation';
+END;
+
+CREATE TRIGGER representation_delete_version AFTER DELETE ON representation
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'representation';
+END;
+
+CREATE TRIGGER representation_date_insert_version AFTER INSERT ON representation_date
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'representation_date';
+END;
+
+CREATE TRIGGER representation_date_update_version AFTER UPDATE ON representation_date
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'representation_date';
+END;
+
+CREATE TRIGGER representation_date_delete_version AFTER DELETE ON representation_date
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'representation_date';
+END;
+
+CREATE TRIGGER artist_representation_date_insert_version AFTER INSERT ON artist_representation_date
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist_representation_date';
+END;
+
+CREATE TRIGGER artist_representation_date_update_version AFTER UPDATE ON artist_representation_date
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist_representation_date';
+END;
+
+CREATE TRIGGER artist_representation_date_delete_version AFTER DELETE ON artist_representation_date
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist_representation_date';
+END;
+
+CREATE TRIGGER costume_insert_version AFTER INSERT ON costume
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'costume';
+END;
+
+CREATE TRIGGER costume_update_version AFTER UPDATE ON costume
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'costume';
+END;
+
+CREATE TRIGGER costume_delete_version AFTER DELETE ON costume
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'costume';
+END;
+
+CREATE TRIGGER costume_spectacle_insert_version AFTER INSERT ON costume_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'costume_spectacle';
+END;
+
+CREATE TRIGGER costume_spectacle_update_version AFTER UPDATE ON costume_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'costume_spectacle';
+END;
+
+CREATE TRIGGER costume_spectacle_delete_version AFTER DELETE ON costume_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'costume_spectacle';
+END;
+
+CREATE TRIGGER makeup_insert_version AFTER INSERT ON makeup
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'makeup';
+END;
+
+CREATE TRIGGER makeup_update_version AFTER UPDATE ON makeup
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'makeup';
+END;
+
+CREATE TRIGGER makeup_delete_version AFTER DELETE ON makeup
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'makeup';
+END;
+
+CREATE TRIGGER makeup_spectacle_insert_version AFTER INSERT ON makeup_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'makeup_spectacle';
+END;
+
+CREATE TRIGGER makeup_spectacle_update_version AFTER UPDATE ON makeup_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'makeup_spectacle';
+END;
+
+CREATE TRIGGER makeup_spectacle_delete_version AFTER DELETE ON makeup_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'makeup_spectacle';
+END;
+
+CREATE TRIGGER sound_insert_version AFTER INSERT ON sound
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'sound';
+END;
+
+CREATE TRIGGER sound_update_version AFTER UPDATE ON sound
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'sound';
+END;
+
+CREATE TRIGGER sound_delete_version AFTER DELETE ON sound
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'sound';
+END;
+
+CREATE TRIGGER sound_spectacle_insert_version AFTER INSERT ON sound_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'sound_spectacle';
+END;
+
+CREATE TRIGGER sound_spectacle_update_version AFTER UPDATE ON sound_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'sound_spectacle';
+END;
+
+CREATE TRIGGER sound_spectacle_delete_version AFTER DELETE ON sound_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'sound_spectacle';
+END;
+
+CREATE TRIGGER vehicle_insert_version AFTER INSERT ON vehicle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'vehicle';
+END;
+
+CREATE TRIGGER vehicle_update_version AFTER UPDATE ON vehicle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'vehicle';
+END;
+
+CREATE TRIGGER vehicle_delete_version AFTER DELETE ON vehicle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'vehicle';
+END;
+
+CREATE TRIGGER vehicle_spectacle_insert_version AFTER INSERT ON vehicle_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'vehicle_spectacle';
+END;
+
+CREATE TRIGGER vehicle_spectacle_update_version AFTER UPDATE ON vehicle_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'vehicle_spectacle';
+END;
+
+CREATE TRIGGER vehicle_spectacle_delete_version AFTER DELETE ON vehicle_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'vehicle_spectacle';
+END;
+
+CREATE TRIGGER card_insert_version AFTER INSERT ON card
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'card';
+END;
+
+CREATE TRIGGER card_update_version AFTER UPDATE ON card
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'card';
+END;
+
+CREATE TRIGGER card_delete_version AFTER DELETE ON card
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'card';
+END;
+
+CREATE TRIGGER card_spectacle_insert_version AFTER INSERT ON card_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'card_spectacle';
+END;
+
+CREATE TRIGGER card_spectacle_update_version AFTER UPDATE ON card_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'card_spectacle';
+END;
+
+CREATE TRIGGER card_spectacle_delete_version AFTER DELETE ON card_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'card_spectacle';
+END;
+
+CREATE TRIGGER beeper_insert_version AFTER INSERT ON beeper
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'beeper';
+END;
+
+CREATE TRIGGER beeper_update_version AFTER UPDATE ON beeper
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'beeper';
+END;
+
+CREATE TRIGGER beeper_delete_version AFTER DELETE ON beeper
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'beeper';
+END;
+
+CREATE TRIGGER beeper_spectacle_insert_version AFTER INSERT ON beeper_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'beeper_spectacle';
+END;
+
+CREATE TRIGGER beeper_spectacle_update_version AFTER UPDATE ON beeper_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'beeper_spectacle';
+END;
+
+CREATE TRIGGER beeper_spectacle_delete_version AFTER DELETE ON beeper_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'beeper_spectacle';
+END;
@@ -1,4 +1,5 @@
 PRAGMA foreign_keys=ON;
+PRAGMA user_version=6;
 
 CREATE TABLE person (
   id INTEGER PRIMARY KEY,
@@ -12,6 +13,9 @@ CREATE TABLE person (
   comment TEXT
 );
 
+CREATE INDEX person_mail ON person (mail);
+CREATE INDEX person_reset_password ON person (reset_password);
+
 CREATE TABLE spectacle (
   id INTEGER PRIMARY KEY,
   event TEXT NOT NULL,
@@ -37,12 +41,18 @@ CREATE TABLE spectacle (
   pocket BOOLEAN
 );
 
+CREATE INDEX spectacle_date_from ON spectacle (date_from);
+CREATE INDEX spectacle_date_to ON spectacle (date_to);
+
 CREATE TABLE spectacle_image (
   id INTEGER PRIMARY KEY,
-  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id),
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE,
   filename TEXT
 );
 
+CREATE INDEX spectacle_image_spectacle_id
+ON spectacle_image (spectacle_id);
+
 CREATE TABLE artist (
   id INTEGER PRIMARY KEY,
   person_id INTEGER NOT NULL REFERENCES person(id),
@@ -50,12 +60,17 @@ CREATE TABLE artist (
   hidden BOOLEAN NOT NULL DEFAULT FALSE
 );
 
+CREATE INDEX artist_person_id ON artist (person_id);
+
 CREATE TABLE contract (
   id INTEGER PRIMARY KEY,
-  artist_id INTEGER NOT NULL REFERENCES artist(id),
-  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id)
+  artist_id INTEGER NOT NULL REFERENCES artist(id) ON DELETE CASCADE,
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE
 );
 
+CREATE INDEX contract_artist_id ON contract (artist_id);
+CREATE INDEX contract_spectacle_id ON contract (spectacle_id);
+
 CREATE TABLE artist_availability (
   id INTEGER PRIMARY KEY,
   artist_id INTEGER NOT NULL REFERENCES artist(id),
@@ -63,24 +78,42 @@ CREATE TABLE artist_availability (
   available BOOLEAN NOT NULL
 );
 
+CREATE INDEX artist_availability_artist_id_date
+ON artist_availability (artist_id, date);
+CREATE INDEX artist_availability_date
+ON artist_availability (date);
+
 CREATE TABLE representation (
   id INTEGER PRIMARY KEY,
-  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id),
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE,
   name TEXT NOT NULL
 );
 
+CREATE INDEX representation_spectacle_id
+ON representation (spectacle_id);
+
 CREATE TABLE representation_date (
   id INTEGER PRIMARY KEY,
-  representation_id INTEGER NOT NULL REFERENCES representation(id),
+  representation_id INTEGER NOT NULL REFERENCES representation(id) ON DELETE CASCADE,
   date DATE NOT NULL
 );
 
+CREATE INDEX representation_date_representation_id
+ON representation_date (representation_id);
+CREATE INDEX representation_date_date
+ON representation_date (date, representation_id);
+
 CREATE TABLE artist_representation_date (
   id INTEGER PRIMARY KEY,
-  artist_id INTEGER NOT NULL REFERENCES artist(id),
-  representation_date_id INTEGER NOT NULL REFERENCES representation_date(id)
+  artist_id INTEGER NOT NULL REFERENCES artist(id) ON DELETE CASCADE,
+  representation_date_id INTEGER NOT NULL REFERENCES representation_date(id) ON DELETE CASCADE
 );
 
+CREATE INDEX artist_representation_date_artist_id
+ON artist_representation_date (artist_id, representation_date_id);
+CREATE INDEX artist_representation_date_representation_date_id
+ON artist_representation_date (representation_date_id);
+
 CREATE TABLE costume (
   id INTEGER PRIMARY KEY,
   name TEXT NOT NULL,
@@ -90,10 +123,15 @@ CREATE TABLE costume (
 
 CREATE TABLE costume_spectacle (
   id INTEGER PRIMARY KEY,
-  costume_id INTEGER NOT NULL REFERENCES costume(id),
-  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id)
+  costume_id INTEGER NOT NULL REFERENCES costume(id) ON DELETE CASCADE,
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE
 );
 
+CREATE INDEX costume_spectacle_costume_id
+ON costume_spectacle (costume_id);
+CREATE INDEX costume_spectacle_spectacle_id
+ON costume_spectacle (spectacle_id);
+
 CREATE TABLE makeup (
   id INTEGER PRIMARY KEY,
   name TEXT NOT NULL,
@@ -103,10 +141,15 @@ CREATE TABLE makeup (
 
 CREATE TABLE makeup_spectacle (
   id INTEGER PRIMARY KEY,
-  makeup_id INTEGER NOT NULL REFERENCES makeup(id),
-  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id)
+  makeup_id INTEGER NOT NULL REFERENCES makeup(id) ON DELETE CASCADE,
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE
 );
 
+CREATE INDEX makeup_spectacle_makeup_id
+ON makeup_spectacle (makeup_id);
+CREATE INDEX makeup_spectacle_spectacle_id
+ON makeup_spectacle (spectacle_id);
+
 CREATE TABLE sound (
   id INTEGER PRIMARY KEY,
   name TEXT NOT NULL,
@@ -116,10 +159,15 @@ CREATE TABLE sound (
 
 CREATE TABLE sound_spectacle (
   id INTEGER PRIMARY KEY,
-  sound_id INTEGER NOT NULL REFERENCES sound(id),
-  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id)
+  sound_id INTEGER NOT NULL REFERENCES sound(id) ON DELETE CASCADE,
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE
 );
 
+CREATE INDEX sound_spectacle_sound_id
+ON sound_spectacle (sound_id);
+CREATE INDEX sound_spectacle_spectacle_id
+ON sound_spectacle (spectacle_id);
+
 CREATE TABLE vehicle (
   id INTEGER PRIMARY KEY,
   name TEXT NOT NULL,
@@ -138,10 +186,15 @@ CREATE TABLE vehicle (
 
 CREATE TABLE vehicle_spectacle (
   id INTEGER PRIMARY KEY,
-  vehicle_id INTEGER NOT NULL REFERENCES vehicle(id),
-  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id)
+  vehicle_id INTEGER NOT NULL REFERENCES vehicle(id) ON DELETE CASCADE,
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE
 );
 
+CREATE INDEX vehicle_spectacle_vehicle_id
+ON vehicle_spectacle (vehicle_id);
+CREATE INDEX vehicle_spectacle_spectacle_id
+ON vehicle_spectacle (spectacle_id);
+
 CREATE TABLE card (
   id INTEGER PRIMARY KEY,
   name TEXT NOT NULL,
@@ -151,10 +204,15 @@ CREATE TABLE card (
 
 CREATE TABLE card_spectacle (
   id INTEGER PRIMARY KEY,
-  card_id INTEGER NOT NULL REFERENCES card(id),
-  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id)
+  card_id INTEGER NOT NULL REFERENCES card(id) ON DELETE CASCADE,
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE
 );
 
+CREATE INDEX card_spectacle_card_id
+ON card_spectacle (card_id);
+CREATE INDEX card_spectacle_spectacle_id
+ON card_spectacle (spectacle_id);
+
 CREATE TABLE beeper (
   id INTEGER PRIMARY KEY,
   name TEXT NOT NULL,
@@ -164,6 +222,775 @@ CREATE TABLE beeper (
 
 CREATE TABLE beeper_spectacle (
   id INTEGER PRIMARY KEY,
-  beeper_id INTEGER NOT NULL REFERENCES beeper(id),
-  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id)
+  beeper_id INTEGER NOT NULL REFERENCES beeper(id) ON DELETE CASCADE,
+  spectacle_id INTEGER NOT NULL REFERENCES spectacle(id) ON DELETE CASCADE
 );
+
+
+CREATE INDEX beeper_spectacle_beeper_id
+ON beeper_spectacle (beeper_id);
+CREATE INDEX beeper_spectacle_spectacle_id
+ON beeper_spectacle (spectacle_id);
+
+CREATE TABLE mail (
+  id INTEGER PRIMARY KEY,
+  sender TEXT NOT NULL,
+  recipients TEXT NOT NULL,
+  subject TEXT,
+  message BLOB NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending',
+  attempts INTEGER NOT NULL DEFAULT 0,
+  error TEXT,
+  created TIMESTAMP NOT NULL,
+  next_attempt TIMESTAMP NOT NULL,
+  sent TIMESTAMP
+);
+
+CREATE INDEX mail_status_next_attempt ON mail (status, next_attempt);
+
+CREATE TABLE spectacle_summary (
+  spectacle_id INTEGER PRIMARY KEY REFERENCES spectacle(id),
+  first_date DATE,
+  last_date DATE,
+  contract_artist_ids TEXT,
+  vehicles TEXT,
+  makeups TEXT,
+  sounds TEXT,
+  beepers TEXT,
+  cards TEXT,
+  artists TEXT,
+  representations TEXT
+);
+
+CREATE VIEW spectacle_summary_view AS
+SELECT
+  spectacle.id AS spectacle_id,
+  (
+    SELECT MIN(date)
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    WHERE representation.spectacle_id = spectacle.id
+  ) AS first_date,
+  (
+    SELECT MAX(date)
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    WHERE representation.spectacle_id = spectacle.id
+  ) AS last_date,
+  (
+    SELECT GROUP_CONCAT(DISTINCT contract.artist_id)
+    FROM contract
+    WHERE contract.spectacle_id = spectacle.id
+  ) AS contract_artist_ids,
+  (
+    SELECT GROUP_CONCAT(DISTINCT replace(vehicle.name, ',', ' '))
+    FROM vehicle_spectacle
+    JOIN vehicle
+    ON vehicle_spectacle.vehicle_id = vehicle.id
+    WHERE vehicle_spectacle.spectacle_id = spectacle.id
+  ) AS vehicles,
+  (
+    SELECT GROUP_CONCAT(DISTINCT replace(makeup.name, ',', ' '))
+    FROM makeup_spectacle
+    JOIN makeup
+    ON makeup_spectacle.makeup_id = makeup.id
+    WHERE makeup_spectacle.spectacle_id = spectacle.id
+  ) AS makeups,
+  (
+    SELECT GROUP_CONCAT(DISTINCT replace(sound.name, ',', ' '))
+    FROM sound_spectacle
+    JOIN sound
+    ON sound_spectacle.sound_id = sound.id
+    WHERE sound_spectacle.spectacle_id = spectacle.id
+  ) AS sounds,
+  (
+    SELECT GROUP_CONCAT(DISTINCT replace(beeper.name, ',', ' '))
+    FROM beeper_spectacle
+    JOIN beeper
+    ON beeper_spectacle.beeper_id = beeper.id
+    WHERE beeper_spectacle.spectacle_id = spectacle.id
+  ) AS beepers,
+  (
+    SELECT GROUP_CONCAT(DISTINCT replace(card.name, ',', ' '))
+    FROM card_spectacle
+    JOIN card
+    ON card_spectacle.card_id = card.id
+    WHERE card_spectacle.spectacle_id = spectacle.id
+  ) AS cards,
+  (
+    SELECT GROUP_CONCAT(DISTINCT replace(person.name, ',', ' '))
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    JOIN artist_representation_date
+    ON representation_date.id = artist_representation_date.representation_date_id
+    JOIN artist
+    ON artist.id = artist_representation_date.artist_id
+    JOIN person
+    ON person.id = artist.person_id
+    WHERE representation.spectacle_id = spectacle.id
+  ) AS artists,
+  (
+    SELECT GROUP_CONCAT(DISTINCT replace(representation.name, ',', ' '))
+    FROM representation
+    WHERE representation.spectacle_id = spectacle.id
+  ) AS representations
+FROM spectacle;
+
+CREATE TRIGGER spectacle_insert_summary AFTER INSERT ON spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.id;
+END;
+
+CREATE TRIGGER spectacle_delete_summary AFTER DELETE ON spectacle
+BEGIN
+  DELETE FROM spectacle_summary WHERE spectacle_id = OLD.id;
+END;
+
+CREATE TRIGGER contract_insert_summary AFTER INSERT ON contract
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER contract_update_summary AFTER UPDATE ON contract
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER contract_delete_summary AFTER DELETE ON contract
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TRIGGER representation_insert_summary AFTER INSERT ON representation
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER representation_update_summary AFTER UPDATE ON representation
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER representation_delete_summary AFTER DELETE ON representation
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TRIGGER vehicle_spectacle_insert_summary AFTER INSERT ON vehicle_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER vehicle_spectacle_update_summary AFTER UPDATE ON vehicle_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER vehicle_spectacle_delete_summary AFTER DELETE ON vehicle_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TRIGGER makeup_spectacle_insert_summary AFTER INSERT ON makeup_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER makeup_spectacle_update_summary AFTER UPDATE ON makeup_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER makeup_spectacle_delete_summary AFTER DELETE ON makeup_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TRIGGER sound_spectacle_insert_summary AFTER INSERT ON sound_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER sound_spectacle_update_summary AFTER UPDATE ON sound_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER sound_spectacle_delete_summary AFTER DELETE ON sound_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TRIGGER beeper_spectacle_insert_summary AFTER INSERT ON beeper_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER beeper_spectacle_update_summary AFTER UPDATE ON beeper_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER beeper_spectacle_delete_summary AFTER DELETE ON beeper_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TRIGGER card_spectacle_insert_summary AFTER INSERT ON card_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = NEW.spectacle_id;
+END;
+
+CREATE TRIGGER card_spectacle_update_summary AFTER UPDATE ON card_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (OLD.spectacle_id, NEW.spectacle_id);
+END;
+
+CREATE TRIGGER card_spectacle_delete_summary AFTER DELETE ON card_spectacle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id = OLD.spectacle_id;
+END;
+
+CREATE TRIGGER representation_date_insert_summary AFTER INSERT ON representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM representation
+    WHERE id = NEW.representation_id
+  );
+END;
+
+CREATE TRIGGER representation_date_update_summary AFTER UPDATE ON representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM representation
+    WHERE id IN (OLD.representation_id, NEW.representation_id)
+  );
+END;
+
+CREATE TRIGGER representation_date_delete_summary AFTER DELETE ON representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM representation
+    WHERE id = OLD.representation_id
+  );
+END;
+
+CREATE TRIGGER artist_representation_date_insert_summary AFTER INSERT ON artist_representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT representation.spectacle_id
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    WHERE representation_date.id = NEW.representation_date_id
+  );
+END;
+
+CREATE TRIGGER artist_representation_date_update_summary AFTER UPDATE ON artist_representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT representation.spectacle_id
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    WHERE representation_date.id IN (
+      OLD.representation_date_id, NEW.representation_date_id)
+  );
+END;
+
+CREATE TRIGGER artist_representation_date_delete_summary AFTER DELETE ON artist_representation_date
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT representation.spectacle_id
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    WHERE representation_date.id = OLD.representation_date_id
+  );
+END;
+
+CREATE TRIGGER vehicle_update_summary AFTER UPDATE OF name ON vehicle
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM vehicle_spectacle
+    WHERE vehicle_id = NEW.id
+  );
+END;
+
+CREATE TRIGGER makeup_update_summary AFTER UPDATE OF name ON makeup
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM makeup_spectacle
+    WHERE makeup_id = NEW.id
+  );
+END;
+
+CREATE TRIGGER sound_update_summary AFTER UPDATE OF name ON sound
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM sound_spectacle
+    WHERE sound_id = NEW.id
+  );
+END;
+
+CREATE TRIGGER beeper_update_summary AFTER UPDATE OF name ON beeper
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM beeper_spectacle
+    WHERE beeper_id = NEW.id
+  );
+END;
+
+CREATE TRIGGER card_update_summary AFTER UPDATE OF name ON card
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT spectacle_id
+    FROM card_spectacle
+    WHERE card_id = NEW.id
+  );
+END;
+
+CREATE TRIGGER person_update_summary AFTER UPDATE OF firstname, lastname ON person
+BEGIN
+  INSERT OR REPLACE INTO spectacle_summary
+  SELECT * FROM spectacle_summary_view
+  WHERE spectacle_id IN (
+    SELECT representation.spectacle_id
+    FROM representation
+    JOIN representation_date
+    ON representation.id = representation_date.representation_id
+    JOIN artist_representation_date
+    ON representation_date.id = artist_representation_date.representation_date_id
+    JOIN artist
+    ON artist.id = artist_representation_date.artist_id
+    WHERE artist.person_id = NEW.id
+  );
+END;
+
+CREATE VIRTUAL TABLE spectacle_interval USING rtree_i32(id, day_from, day_to);
+
+CREATE TRIGGER spectacle_insert_interval AFTER INSERT ON spectacle
+BEGIN
+  INSERT INTO spectacle_interval VALUES (
+    NEW.id,
+    CAST(julianday(min(NEW.date_from, NEW.date_to)) AS INTEGER),
+    CAST(julianday(max(NEW.date_from, NEW.date_to)) AS INTEGER)
+  );
+END;
+
+CREATE TRIGGER spectacle_update_interval AFTER UPDATE OF date_from, date_to ON spectacle
+BEGIN
+  UPDATE spectacle_interval
+  SET
+    day_from = CAST(julianday(min(NEW.date_from, NEW.date_to)) AS INTEGER),
+    day_to = CAST(julianday(max(NEW.date_from, NEW.date_to)) AS INTEGER)
+  WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER spectacle_delete_interval AFTER DELETE ON spectacle
+BEGIN
+  DELETE FROM spectacle_interval WHERE id = OLD.id;
+END;
+
+CREATE TABLE table_version (
+  name TEXT PRIMARY KEY,
+  version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT INTO table_version (name) VALUES
+('person'),
+('spectacle'),
+('spectacle_summary'),
+('artist'),
+('artist_availability'),
+('representation'),
+('representation_date'),
+('artist_representation_date'),
+('costume'),
+('costume_spectacle'),
+('makeup'),
+('makeup_spectacle'),
+('sound'),
+('sound_spectacle'),
+('vehicle'),
+('vehicle_spectacle'),
+('card'),
+('card_spectacle'),
+('beeper'),
+('beeper_spectacle');
+
+CREATE TRIGGER person_insert_version AFTER INSERT ON person
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'person';
+END;
+
+CREATE TRIGGER person_update_version AFTER UPDATE ON person
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'person';
+END;
+
+CREATE TRIGGER person_delete_version AFTER DELETE ON person
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'person';
+END;
+
+CREATE TRIGGER spectacle_insert_version AFTER INSERT ON spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'spectacle';
+END;
+
+CREATE TRIGGER spectacle_update_version AFTER UPDATE ON spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'spectacle';
+END;
+
+CREATE TRIGGER spectacle_delete_version AFTER DELETE ON spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'spectacle';
+END;
+
+CREATE TRIGGER spectacle_summary_insert_version AFTER INSERT ON spectacle_summary
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'spectacle_summary';
+END;
+
+CREATE TRIGGER spectacle_summary_update_version AFTER UPDATE ON spectacle_summary
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'spectacle_summary';
+END;
+
+CREATE TRIGGER spectacle_summary_delete_version AFTER DELETE ON spectacle_summary
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'spectacle_summary';
+END;
+
+CREATE TRIGGER artist_insert_version AFTER INSERT ON artist
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist';
+END;
+
+CREATE TRIGGER artist_update_version AFTER UPDATE ON artist
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist';
+END;
+
+CREATE TRIGGER artist_delete_version AFTER DELETE ON artist
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist';
+END;
+
+CREATE TRIGGER artist_availability_insert_version AFTER INSERT ON artist_availability
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist_availability';
+END;
+
+CREATE TRIGGER artist_availability_update_version AFTER UPDATE ON artist_availability
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist_availability';
+END;
+
+CREATE TRIGGER artist_availability_delete_version AFTER DELETE ON artist_availability
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist_availability';
+END;
+
+CREATE TRIGGER representation_insert_version AFTER INSERT ON representation
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'representation';
+END;
+
+CREATE TRIGGER representation_update_version AFTER UPDATE ON representation
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'representation';
+END;
+
+CREATE TRIGGER representation_delete_version AFTER DELETE ON representation
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'representation';
+END;
+
+CREATE TRIGGER representation_date_insert_version AFTER INSERT ON representation_date
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'representation_date';
+END;
+
+CREATE TRIGGER representation_date_update_version AFTER UPDATE ON representation_date
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'representation_date';
+END;
+
+CREATE TRIGGER representation_date_delete_version AFTER DELETE ON representation_date
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'representation_date';
+END;
+
+CREATE TRIGGER artist_representation_date_insert_version AFTER INSERT ON artist_representation_date
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist_representation_date';
+END;
+
+CREATE TRIGGER artist_representation_date_update_version AFTER UPDATE ON artist_representation_date
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist_representation_date';
+END;
+
+CREATE TRIGGER artist_representation_date_delete_version AFTER DELETE ON artist_representation_date
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'artist_representation_date';
+END;
+
+CREATE TRIGGER costume_insert_version AFTER INSERT ON costume
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'costume';
+END;
+
+CREATE TRIGGER costume_update_version AFTER UPDATE ON costume
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'costume';
+END;
+
+CREATE TRIGGER costume_delete_version AFTER DELETE ON costume
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'costume';
+END;
+
+CREATE TRIGGER costume_spectacle_insert_version AFTER INSERT ON costume_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'costume_spectacle';
+END;
+
+CREATE TRIGGER costume_spectacle_update_version AFTER UPDATE ON costume_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'costume_spectacle';
+END;
+
+CREATE TRIGGER costume_spectacle_delete_version AFTER DELETE ON costume_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'costume_spectacle';
+END;
+
+CREATE TRIGGER makeup_insert_version AFTER INSERT ON makeup
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'makeup';
+END;
+
+CREATE TRIGGER makeup_update_version AFTER UPDATE ON makeup
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'makeup';
+END;
+
+CREATE TRIGGER makeup_delete_version AFTER DELETE ON makeup
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'makeup';
+END;
+
+CREATE TRIGGER makeup_spectacle_insert_version AFTER INSERT ON makeup_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'makeup_spectacle';
+END;
+
+CREATE TRIGGER makeup_spectacle_update_version AFTER UPDATE ON makeup_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'makeup_spectacle';
+END;
+
+CREATE TRIGGER makeup_spectacle_delete_version AFTER DELETE ON makeup_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'makeup_spectacle';
+END;
+
+CREATE TRIGGER sound_insert_version AFTER INSERT ON sound
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'sound';
+END;
+
+CREATE TRIGGER sound_update_version AFTER UPDATE ON sound
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'sound';
+END;
+
+CREATE TRIGGER sound_delete_version AFTER DELETE ON sound
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'sound';
+END;
+
+CREATE TRIGGER sound_spectacle_insert_version AFTER INSERT ON sound_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'sound_spectacle';
+END;
+
+CREATE TRIGGER sound_spectacle_update_version AFTER UPDATE ON sound_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'sound_spectacle';
+END;
+
+CREATE TRIGGER sound_spectacle_delete_version AFTER DELETE ON sound_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'sound_spectacle';
+END;
+
+CREATE TRIGGER vehicle_insert_version AFTER INSERT ON vehicle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'vehicle';
+END;
+
+CREATE TRIGGER vehicle_update_version AFTER UPDATE ON vehicle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'vehicle';
+END;
+
+CREATE TRIGGER vehicle_delete_version AFTER DELETE ON vehicle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'vehicle';
+END;
+
+CREATE TRIGGER vehicle_spectacle_insert_version AFTER INSERT ON vehicle_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'vehicle_spectacle';
+END;
+
+CREATE TRIGGER vehicle_spectacle_update_version AFTER UPDATE ON vehicle_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'vehicle_spectacle';
+END;
+
+CREATE TRIGGER vehicle_spectacle_delete_version AFTER DELETE ON vehicle_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'vehicle_spectacle';
+END;
+
+CREATE TRIGGER card_insert_version AFTER INSERT ON card
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'card';
+END;
+
+CREATE TRIGGER card_update_version AFTER UPDATE ON card
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'card';
+END;
+
+CREATE TRIGGER card_delete_version AFTER DELETE ON card
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'card';
+END;
+
+CREATE TRIGGER card_spectacle_insert_version AFTER INSERT ON card_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'card_spectacle';
+END;
+
+CREATE TRIGGER card_spectacle_update_version AFTER UPDATE ON card_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'card_spectacle';
+END;
+
+CREATE TRIGGER card_spectacle_delete_version AFTER DELETE ON card_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'card_spectacle';
+END;
+
+CREATE TRIGGER beeper_insert_version AFTER INSERT ON beeper
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'beeper';
+END;
+
+CREATE TRIGGER beeper_update_version AFTER UPDATE ON beeper
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'beeper';
+END;
+
+CREATE TRIGGER beeper_delete_version AFTER DELETE ON beeper
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'beeper';
+END;
+
+CREATE TRIGGER beeper_spectacle_insert_version AFTER INSERT ON beeper_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'beeper_spectacle';
+END;
+
+CREATE TRIGGER beeper_spectacle_update_version AFTER UPDATE ON beeper_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'beeper_spectacle';
+END;
+
+CREATE TRIGGER beeper_spectacle_delete_version AFTER DELETE ON beeper_spectacle
+BEGIN
+  UPDATE table_version SET version = version + 1 WHERE name = 'beeper_spectacle';
+END;
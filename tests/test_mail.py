@@ -0,0 +1,55 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from threading import Thread
+
+from paillette.bench import SMTPSink
+
+ROOT = Path(__file__).parent.parent
+
+
+def test_pending_mail_sent_on_startup(tmp_path):
+    database = tmp_path / 'paillette.db'
+    connection = sqlite3.connect(database)
+    connection.executescript((ROOT / 'sql' / 'model.sql').read_text())
+    now = datetime.now()
+    connection.execute('''
+      INSERT INTO
+        mail (sender, recipients, subject, message, created, next_attempt)
+      VALUES
+        (?, ?, ?, ?, ?, ?)
+    ''', (
+        'sender@example.com', 'artist@example.com', 'Feuille de route',
+        b'Subject: Feuille de route\r\n\r\nBonjour\r\n', now, now))
+    connection.commit()
+
+    sink = SMTPSink()
+    Thread(target=sink.serve_forever, daemon=True).start()
+    config = tmp_path / 'config.py'
+    config.write_text(
+        f'DB = {str(database)!r}\n'
+        f'SMTP_HOSTNAME = {sink.server_address[0]!r}\n'
+        f'SMTP_PORT = {sink.server_address[1]}\n'
+        'SMTP_SSL = False\n'
+        'TEMPLATE_CACHE = False\n'
+        'PRELOAD_TEMPLATES = ()\n')
+
+    # Only importing the application must send the pending mail
+    worker = subprocess.Popen(
+        (sys.executable, '-c', 'import time, paillette; time.sleep(30)'),
+        cwd=ROOT, env={**os.environ, 'PAILLETTE_CONFIG': str(config)})
+    try:
+        for _ in range(100):
+            status, = connection.execute('SELECT status FROM mail').fetchone()
+            if status == 'sent':
+                break
+            time.sleep(0.1)
+    finally:
+        worker.kill()
+        sink.shutdown()
+    assert status == 'sent'
+    assert sink.mails == 1